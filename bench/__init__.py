@@ -0,0 +1 @@
+"""Воспроизводимые замеры «до и после» для оптимизаций IDE (python -m bench.<имя>)."""
@@ -0,0 +1,126 @@
+"""Время подсветки SLC: прежние восемь правил QRegularExpression против одного прохода GFXHighlighter.
+
+    python -m bench.highlight_slc [--lines 10000] [--repeat 3] [--seed 1]
+
+Текст — сцена SLC из --lines строк с цветами, числами и символами вне BMP. Каждый
+вариант делает QSyntaxHighlighter.rehighlight() нового документа, печатается лучшее
+время из --repeat в пересчёте на 10 тыс. строк. Новая подсветка мерится с пустым
+кэшем строк SPAN_CACHE и с прогретым. В конце сравниваются форматы всех блоков.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QGuiApplication, QSyntaxHighlighter, QTextCharFormat, QTextDocument, QColor, QFont
+from PyQt6.QtCore import QRegularExpression
+
+from src.highlighters.gfx_highlighter import GFXHighlighter
+from src.highlighters.span_cache import SPAN_CACHE
+
+
+class BeforeHighlighter(QSyntaxHighlighter):
+    """GFXHighlighter до однопроходного токенизатора: правила по очереди, побеждает последнее"""
+
+    def __init__(self, document):
+        super().__init__(document)
+
+        def fmt(color, bold=False):
+            f = QTextCharFormat()
+            f.setForeground(QColor(color))
+            if bold:
+                f.setFontWeight(QFont.Weight.Bold)
+            return f
+
+        self.rules = [
+            (QRegularExpression(r"\bCreate\b"), fmt("#FF79C6", True)),
+            (QRegularExpression(r"\bList\b"), fmt("#8BE9FD", True)),
+            (QRegularExpression(r"\bStyle\b"), fmt("#50FA7B", True)),
+            (QRegularExpression(r"\b(Square|Circle|Join|Package)\b"), fmt("#BD93F9")),
+            (QRegularExpression(r"\b[a-zA-Z_]+\s*:"), fmt("#8BE9FD")),
+            (QRegularExpression(r"#(?:[0-9A-Fa-f]{3,6})\b"), fmt("#FFB86C")),
+            (QRegularExpression(r"\b\d+(\.\d+)?\b"), fmt("#F1FA8C")),
+            (QRegularExpression(r"[{}()]"), fmt("#6272A4")),
+        ]
+
+    def highlightBlock(self, text):
+        for pattern, fmt in self.rules:
+            it = pattern.globalMatch(text)
+            while it.hasNext():
+                match = it.next()
+                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+
+
+def make_text(lines: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    out = ["Create List Scene() {"]
+    i = 0
+    while len(out) < lines - 1:
+        kind = rnd.choice(("Square", "Circle", "Join", "Package"))
+        color = rnd.choice(("red", "#FF5733", "#abc", "#123456", f"#{rnd.randrange(16 ** 6):06x}"))
+        name = rnd.choice((f"S{i}", f"Фигура{i}", f"Ё𝔘{i}"))
+        out.append(f"    Create {kind} {name}(x: {rnd.randint(-500, 500)}, y: {rnd.random() * 100:.2f}) {{")
+        out.append(f"        Style {{ color: {color}; width: {rnd.randint(1, 90)}; height: {rnd.randint(1, 90)}; }}")
+        out.append("    }")
+        i += 1
+    out.append("}")
+    return "\n".join(out[:lines])
+
+
+def formats(doc: QTextDocument):
+    out = []
+    block = doc.begin()
+    while block.isValid():
+        out.append([(r.start, r.length, r.format.foreground().color().name(), r.format.fontWeight())
+                    for r in block.layout().formats()])
+        block = block.next()
+    return out
+
+
+def best_highlight(cls, text: str, repeat: int, cold: bool):
+    """(лучшее время, форматы блоков)"""
+    best = float("inf")
+    for _ in range(repeat):
+        doc = QTextDocument()
+        doc.setPlainText(text)
+        if cold:
+            SPAN_CACHE.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            highlighter = cls(doc)
+        start = time.perf_counter()
+        highlighter.rehighlight()
+        best = min(best, time.perf_counter() - start)
+    return best, formats(doc)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.highlight_slc", description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    app = QGuiApplication.instance() or QGuiApplication([])
+    text = make_text(args.lines, args.seed)
+    lines = text.count("\n") + 1
+    per_10k = 10000 / lines
+
+    print(f"🎨 {lines} строк SLC, лучшее из {args.repeat}, мс на 10 тыс. строк")
+    before, reference = best_highlight(BeforeHighlighter, text, args.repeat, cold=True)
+    print(f"{'до: 8 правил QRegularExpression':<38} {before * 1e3 * per_10k:>8.0f}")
+    cold, cold_formats = best_highlight(GFXHighlighter, text, args.repeat, cold=True)
+    print(f"{'после: один проход, пустой кэш':<38} {cold * 1e3 * per_10k:>8.0f}   ({before / cold:.1f}×)")
+    warm, warm_formats = best_highlight(GFXHighlighter, text, args.repeat, cold=False)
+    print(f"{'после: один проход, прогретый кэш':<38} {warm * 1e3 * per_10k:>8.0f}   ({before / warm:.1f}×)")
+
+    differ = sum(a != b for a, b in zip(reference, cold_formats)) + sum(a != b for a, b in zip(reference, warm_formats))
+    print("✅ форматы всех блоков совпадают" if not differ else f"❌ форматы отличаются в {differ} блоках")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Время отрисовки сцены: прежний цикл по фигурам против DisplayList (и его пакетов).
+
+    python -m bench.paint_scene [--shapes 100000] [--size 2000] [--repeat 5] [--seed 1]
+
+Сцена случайная, но воспроизводимая (--seed): квадраты и круги, полупрозрачные цвета,
+отрицательные размеры. Каждый вариант рисует всю сцену в QImage --size×--size,
+печатается лучшее время из --repeat. В конце проверяется, что картинки совпадают попиксельно.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QGuiApplication, QImage, QPainter, QColor, QBrush
+from PyQt6.QtCore import QRect
+
+from src.gfx_canvas import BACKGROUND_COLOR, DisplayList
+from src.scene import Scene
+
+_COLORS = ("red", "#00ff00", "blue", "#123456", "#80ff0000", "yellow")
+
+
+def make_scene(n: int, span: int, seed: int) -> Scene:
+    rnd = random.Random(seed)
+    return Scene.from_objects(
+        {
+            "type": rnd.choice(("Square", "Square", "Circle")),
+            "name": f"S{i}",
+            "params": {"x": rnd.randint(0, span), "y": rnd.randint(0, span)},
+            "style": {"color": rnd.choice(_COLORS), "width": str(rnd.randint(5, 40) * rnd.choice((1, 1, 1, -1))),
+                      "height": str(rnd.randint(5, 40))},
+        }
+        for i in range(n)
+    )
+
+
+def paint_before(painter: QPainter, scene: Scene):
+    """Отрисовка до DisplayList: QColor/QBrush, lower() и int() на каждую фигуру при каждой отрисовке"""
+    kinds = [t.lower() for t in scene.types]
+    colors = [QColor(c) for c in scene.colors]
+    painter.setPen(QColor("#00000000"))
+    for kind, x, y, width, height, color in zip(scene.kind, scene.x, scene.y, scene.width, scene.height,
+                                                 scene.color):
+        painter.setBrush(QBrush(colors[color]))
+        if kinds[kind] == "square":
+            painter.drawRect(QRect(int(x), int(y), width, height))
+        elif kinds[kind] == "circle":
+            painter.drawEllipse(int(x), int(y), width, height)
+
+
+def best_paint(image: QImage, paint, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        image.fill(QColor(BACKGROUND_COLOR))
+        painter = QPainter(image)
+        start = time.perf_counter()
+        paint(painter)
+        best = min(best, time.perf_counter() - start)
+        painter.end()
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.paint_scene", description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", type=int, default=100000)
+    parser.add_argument("--size", type=int, default=2000, help="сторона картинки, пикселей")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    app = QGuiApplication.instance() or QGuiApplication([])
+    scene = make_scene(args.shapes, args.size - 50, args.seed)
+    images = {}
+
+    def run(name, paint, setup=0.0):
+        image = QImage(args.size, args.size, QImage.Format.Format_RGB32)
+        seconds = best_paint(image, paint, args.repeat)
+        images[name] = image
+        extra = f"  (+ {setup * 1e3:.0f} мс один раз)" if setup else ""
+        print(f"{name:<32} {seconds * 1e3:>8.0f} мс{extra}")
+        return seconds
+
+    print(f"🖼 {args.shapes} фигур, {args.size}×{args.size}, лучшее из {args.repeat}")
+    before = run("до: цикл по фигурам", lambda p: paint_before(p, scene))
+
+    start = time.perf_counter()
+    dl = DisplayList(scene)
+    build = time.perf_counter() - start
+    dl.batches = []                     # пустой план пакетов: список проигрывается по фигурам
+    replay = run("после: DisplayList по фигурам", dl.paint, build)
+
+    start = time.perf_counter()
+    dl.batches = dl._plan_batches()
+    plan = time.perf_counter() - start
+    batched = run(f"после: пакеты ({len(dl.batches)} шт.)", dl.paint, plan)
+
+    print(f"ускорение: {before / replay:.1f}× по фигурам, {before / batched:.1f}× пакетами")
+    reference = images.pop("до: цикл по фигурам")
+    same = all(image == reference for image in images.values())
+    print("✅ картинки совпадают попиксельно" if same else "❌ картинки отличаются")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Память сцены: Scene (столбцы array) против прежнего списка словарей GFXParser.parse.
+
+    python -m bench.scene_memory [--sizes 10000,100000,1000000]
+
+Фигуры строятся так же, как их выдаёт разбор: у каждой свои строки имени и стиля.
+Память считается tracemalloc — всё, что держит структура после сборки, и пик во время неё.
+"""
+import argparse
+import gc
+import tracemalloc
+
+from src.scene import Scene
+
+_TYPES = ("Square", "Circle")
+_COLORS = ("red", "#00ff00", "blue", "#FFAA00")
+
+
+def shape(i: int) -> dict:
+    """Объект фигуры i в формате GFXParser.parse"""
+    return {
+        "type": _TYPES[i % 2][:],
+        "name": f"S{i}",
+        "params": {"x": i % 997, "y": i % 389},
+        "style": {"color": "".join(_COLORS[i % 4]), "width": str(10 + i % 40), "height": str(10 + i % 30)},
+    }
+
+
+def measure(build):
+    """(результат, удержано байт, пик байт)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.scene_memory", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="числа фигур через запятую")
+    args = parser.parse_args(argv)
+
+    print(f"{'фигур':>9} | {'список словарей':>16} | {'Scene':>10} | {'пик Scene':>10} | {'.slcc':>10} | {'экономия':>8}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        objects, before, _ = measure(lambda: [shape(i) for i in range(n)])
+        del objects
+        scene, after, peak = measure(lambda: Scene.from_objects(shape(i) for i in range(n)))
+        compiled = len(scene.to_bytes())
+        del scene
+        print(f"{n:>9} | {before / 2**20:>13.1f} МБ | {after / 2**20:>7.1f} МБ | {peak / 2**20:>7.1f} МБ"
+              f" | {compiled / 2**20:>7.1f} МБ | {before / max(after, 1):>7.1f}×")
+
+
+if __name__ == "__main__":
+    main()
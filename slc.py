@@ -0,0 +1,46 @@
+"""Командная строка SLC без GUI.
+
+    python -m slc render <папка|файл.slc|файл.slcc> --out <папка> --format png,svg --jobs N [--scale K --dpi D]
+    python -m slc compile <папка|файл.slc> [--out <папка>]
+"""
+import argparse
+import sys
+
+from src.batch_render import FORMATS, compile_tree, render_tree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="slc", description="Инструменты SLC без GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", help="отрисовать .slc в PNG/SVG")
+    render.add_argument("source", help="папка с .slc/.slcc (обходится рекурсивно) или один файл")
+    render.add_argument("--out", required=True, help="папка для картинок")
+    render.add_argument("--format", default="png", help=f"через запятую: {', '.join(FORMATS)}")
+    render.add_argument("--jobs", type=int, default=None, help="число процессов (по умолчанию — число ядер)")
+    render.add_argument("--force", action="store_true", help="перерисовать даже неизменённые файлы")
+    render.add_argument("--scale", type=float, default=1.0, help="масштаб картинки (2 — вдвое больше пикселей)")
+    render.add_argument("--dpi", type=float, default=None, help="DPI, записываемое в PNG")
+
+    compile_ = commands.add_parser("compile", help="скомпилировать .slc в двоичные .slcc")
+    compile_.add_argument("source", help="папка с .slc (обходится рекурсивно) или один файл")
+    compile_.add_argument("--out", default=None, help="папка для .slcc (по умолчанию — рядом с .slc)")
+    compile_.add_argument("--force", action="store_true", help="перекомпилировать даже неизменённые файлы")
+
+    args = parser.parse_args(argv)
+    if args.command == "compile":
+        return 1 if compile_tree(args.source, args.out, args.force) else 0
+
+    formats = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown or not formats:
+        parser.error(f"неизвестный формат: {', '.join(unknown) or args.format}")
+
+    if args.scale <= 0:
+        parser.error("--scale должен быть больше 0")
+    failed = render_tree(args.source, args.out, formats, args.jobs, args.force, args.scale, args.dpi)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
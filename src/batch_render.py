@@ -0,0 +1,183 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.gfx_parser import GFXParser
+from src.scene import COMPILED_EXT, Scene
+
+FORMATS = ("png", "svg")
+MIN_SIZE = 400      # как минимальный размер GFXCanvas
+
+
+def scene_size(scene: Scene, scale: float = 1.0):
+    """Размер картинки: не меньше холста превью и не меньше самой сцены (при масштабе scale)"""
+    width = height = MIN_SIZE
+    for x, y, w, h in zip(scene.x, scene.y, scene.width, scene.height):
+        # как рисует холст (DisplayList): целые x, y и [x + w, x) при отрицательной ширине
+        right = int(x) + (w if w > 0 else 0)
+        bottom = int(y) + (h if h > 0 else 0)
+        if right > width:
+            width = right
+        if bottom > height:
+            height = bottom
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def render_scene(scene: Scene, path: str, scale: float = 1.0, dpi: float = None):
+    """Сохраняет сцену в PNG или SVG без окна, потоком в файл (см. src/export.py)"""
+    # Qt импортируется здесь: в каждом процессе пула уже после выбора offscreen-платформы
+    from src.export import export_scene
+
+    export_scene(scene, path, scale, dpi)
+
+
+def output_paths(source: str, src_root: str, out_root: str, formats):
+    """<out>/<путь относительно src>/<имя>.<формат> для каждого формата"""
+    rel = os.path.splitext(os.path.relpath(source, src_root))[0]
+    return [os.path.join(out_root, f"{rel}.{fmt}") for fmt in formats]
+
+
+def is_up_to_date(source: str, outputs) -> bool:
+    """Все выходные файлы существуют и новее исходника"""
+    src_mtime = os.stat(source).st_mtime
+    try:
+        return all(os.stat(out).st_mtime >= src_mtime for out in outputs)
+    except FileNotFoundError:
+        return False
+
+
+def load_scene(source: str) -> Scene:
+    """Сцена из .slc (разбор) или .slcc (отображение в память без разбора)"""
+    if source.endswith(COMPILED_EXT):
+        return Scene.load(source)
+    with open(source, "r", encoding="utf-8") as f:
+        return GFXParser(f.read()).parse_scene()
+
+
+def render_file(source: str, outputs, scale: float = 1.0, dpi: float = None):
+    """Задача для процесса пула: (исходник, число фигур, ошибка или None)"""
+    try:
+        scene = load_scene(source)
+        for out in outputs:
+            os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+            render_scene(scene, out, scale, dpi)
+        return source, len(scene), None
+    except (SyntaxError, ValueError, OSError, UnicodeDecodeError) as e:
+        return source, 0, str(e)
+
+
+def compile_file(source: str, output: str):
+    """.slc → .slcc: (исходник, число фигур, ошибка или None)"""
+    try:
+        with open(source, "r", encoding="utf-8") as f:
+            scene = GFXParser(f.read()).parse_scene()
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        scene.save(output)
+        return source, len(scene), None
+    except (SyntaxError, OSError, UnicodeDecodeError) as e:
+        return source, 0, str(e)
+
+
+def find_sources(root: str, compiled: bool = True):
+    """.slc (и .slcc, если compiled) в папке; из пары a.slc/a.slcc берётся свежий .slcc"""
+    if os.path.isfile(root):
+        return [root]
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        names = set(filenames)
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            if name.endswith(".slc"):
+                slcc = name + "c"
+                if not (compiled and slcc in names and is_up_to_date(path, [os.path.join(dirpath, slcc)])):
+                    sources.append(path)
+            elif compiled and name.endswith(COMPILED_EXT):
+                slc = name[:-1]
+                if slc not in names or is_up_to_date(os.path.join(dirpath, slc), [path]):
+                    sources.append(path)
+    return sources
+
+
+def compile_tree(src_root: str, out_root: str = None, force: bool = False):
+    """Компилирует все .slc в .slcc (рядом с исходником или в out_root); возвращает число ошибок"""
+    start = time.perf_counter()
+    base = src_root if os.path.isdir(src_root) else os.path.dirname(src_root)
+    compiled = skipped = failed = shapes = 0
+    for source in find_sources(src_root, compiled=False):
+        if out_root is None:
+            output = source + "c"
+        else:
+            output = output_paths(source, base, out_root, [COMPILED_EXT[1:]])[0]
+        if not force and is_up_to_date(source, [output]):
+            skipped += 1
+            continue
+        _, count, error = compile_file(source, output)
+        if error is None:
+            compiled += 1
+            shapes += count
+        else:
+            failed += 1
+            print(f"✖ {source}: {error}")
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ Скомпилировано: {compiled}, {skipped} без изменений, {failed} с ошибками "
+        f"за {elapsed:.2f} с ({shapes} фигур)"
+    )
+    return failed
+
+
+def _init_worker():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def render_tree(src_root: str, out_root: str, formats=FORMATS, jobs: int = None, force: bool = False,
+                scale: float = 1.0, dpi: float = None):
+    """Рендерит все .slc/.slcc из src_root в out_root параллельно; печатает ошибки и статистику.
+
+    Возвращает число файлов с ошибками.
+    """
+    _init_worker()
+    start = time.perf_counter()
+    base = src_root if os.path.isdir(src_root) else os.path.dirname(src_root)
+    tasks, skipped = [], 0
+    for source in find_sources(src_root):
+        outputs = output_paths(source, base, out_root, formats)
+        if not force and is_up_to_date(source, outputs):
+            skipped += 1
+        else:
+            tasks.append((source, outputs))
+
+    jobs = jobs or os.cpu_count() or 1
+    rendered = failed = shapes = 0
+    if tasks:
+        sources, outputs = zip(*tasks)
+        scales, dpis = [scale] * len(tasks), [dpi] * len(tasks)
+        if jobs == 1:
+            results = map(render_file, sources, outputs, scales, dpis)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+            results = pool.map(render_file, sources, outputs, scales, dpis,
+                               chunksize=max(1, len(tasks) // (jobs * 8)))
+        try:
+            for source, count, error in results:
+                if error is None:
+                    rendered += 1
+                    shapes += count
+                else:
+                    failed += 1
+                    print(f"✖ {source}: {error}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    rate = elapsed or 1e-9
+    print(
+        f"✅ Готово: {rendered} отрисовано, {skipped} без изменений, {failed} с ошибками "
+        f"за {elapsed:.2f} с ({jobs} процесс.)\n"
+        f"📊 {rendered / rate:.1f} файлов/с, {shapes / rate:.0f} фигур/с"
+    )
+    return failed
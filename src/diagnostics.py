@@ -0,0 +1,126 @@
+from bisect import bisect_left, bisect_right
+from heapq import merge
+
+
+class DiagnosticStore:
+    """Диагностики редактора, упорядоченные по строке.
+
+    Запись — (строка, колонка, длина, сообщение), строки и колонки с 1. Отдельный
+    список строк нужен для bisect: диагностики видимых строк находятся за O(log n),
+    так что отрисовка не зависит от того, сколько их всего. Правки документа
+    сдвигают строки (apply_edit), как курсоры QTextCursor сдвигает сам Qt.
+    """
+
+    def __init__(self):
+        self._items = []
+        self._lines = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, line: int, col: int, length: int, message: str):
+        item = (line, col, length, message)
+        i = bisect_right(self._items, item)
+        self._items.insert(i, item)
+        self._lines.insert(i, line)
+
+    def extend(self, items):
+        """Много записей (строка, колонка, длина, сообщение) разом — одна сортировка"""
+        self._items.extend(items)
+        self._items.sort()
+        self._lines = [item[0] for item in self._items]
+
+    def clear(self):
+        self._items = []
+        self._lines = []
+
+    def replace_lines(self, first: int, last: int, items):
+        """Записи строк first..last включительно заменяются на items (из тех же строк)"""
+        a = bisect_left(self._lines, first)
+        b = bisect_right(self._lines, last)
+        items = sorted(items)
+        self._items[a:b] = items
+        self._lines[a:b] = [item[0] for item in items]
+
+    def between(self, first: int, last: int):
+        """Записи строк first..last включительно"""
+        return self._items[bisect_left(self._lines, first):bisect_right(self._lines, last)]
+
+    def lines_between(self, first: int, last: int) -> set:
+        return set(self._lines[bisect_left(self._lines, first):bisect_right(self._lines, last)])
+
+    def apply_edit(self, line: int, col: int, removed_lines: int, added_lines: int):
+        """Правка с позиции (line, col) удалила removed_lines переводов строк и вставила added_lines.
+
+        col — колонка начала правки с 0. Записи до правки остаются на месте, записи после
+        удалённого участка сдвигаются на added_lines - removed_lines строк. Текст строки
+        line от col и дальше уходит на строку line + added_lines (Enter в начале строки
+        уносит её диагностики вниз); строки, удалённые целиком, теряют свои записи.
+        Из последней затронутой строки остаётся хвост после удалённого участка — её
+        записи переезжают вместе с ним.
+        """
+        if not removed_lines and not added_lines:
+            return
+        last = line + removed_lines         # последняя затронутая строка (в старой нумерации)
+        delta = added_lines - removed_lines
+        start = bisect_left(self._lines, line)
+        end = bisect_right(self._lines, last)
+        touched = []
+        for item in self._items[start:end]:
+            l, c = item[0], item[1]
+            if l == line and c - 1 < col:
+                touched.append(item)                            # до начала правки
+            elif l == line and removed_lines:
+                continue                                        # удалено вместе со строкой
+            elif line < l < last:
+                continue                                        # строка удалена целиком
+            else:
+                touched.append((l + delta, *item[1:]))          # текст за правкой
+        touched.sort()
+        tail = [(l + delta, c, length, msg) for l, c, length, msg in self._items[end:]]
+        self._items[start:] = touched + tail
+        self._lines[start:] = [item[0] for item in self._items[start:]]
+
+
+class DiagnosticSources:
+    """Диагностики из нескольких источников (проверка строк, разбор по F5, Python…),
+    у каждого своя DiagnosticStore: источник обновляет только свои записи и не
+    затирает чужие. Для отрисовки и панели проблем — то же чтение, что у одной
+    DiagnosticStore, по всем источникам сразу.
+    """
+
+    def __init__(self):
+        self.stores = {}
+
+    def store(self, source: str) -> DiagnosticStore:
+        store = self.stores.get(source)
+        if store is None:
+            store = self.stores[source] = DiagnosticStore()
+        return store
+
+    def __len__(self):
+        return sum(len(store) for store in self.stores.values())
+
+    def __iter__(self):
+        return merge(*self.stores.values())
+
+    def clear(self, source: str = None):
+        """Записи источника source; без него — все"""
+        for name, store in self.stores.items():
+            if source is None or name == source:
+                store.clear()
+
+    def between(self, first: int, last: int):
+        items = [item for store in self.stores.values() for item in store.between(first, last)]
+        items.sort()
+        return items
+
+    def lines_between(self, first: int, last: int) -> set:
+        return set().union(*(store.lines_between(first, last) for store in self.stores.values()))
+
+    def apply_edit(self, line: int, col: int, removed_lines: int, added_lines: int):
+        for store in self.stores.values():
+            store.apply_edit(line, col, removed_lines, added_lines)
@@ -0,0 +1,113 @@
+import struct
+import zlib
+
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from src.batch_render import scene_size
+from src.gfx_canvas import BACKGROUND_COLOR, TILE_SIZE, SceneRenderer, _SHAPE_KINDS, _SKIP, _SQUARE
+from src.scene import Scene
+
+# === Экспорт без ограничения по размеру ===
+# SVG пишется в файл потоком прямо из столбцов Scene, без QSvgGenerator и QPainter.
+# PNG собирается полосами высотой в плитку: полоса рисуется плитками SceneRenderer,
+# сжимается zlib и сразу уходит в файл чанками IDAT. В памяти — только одна полоса,
+# так что картинка 20000 × 20000 занимает ~50 МБ, а не 1,6 ГБ.
+_SVG_CHUNK = 4096               # фигур на одну запись в файл
+_PNG_LEVEL = 1               # полосы большие и однородные: сжатие сильнее стоит вдвое дольше
+
+
+def write_svg(scene: Scene, path: str, width: int, height: int, scale: float = 1.0):
+    """Сцена в SVG width × height; фигуры — как их рисует холст при масштабе scale"""
+    kinds = [_SHAPE_KINDS.get(t.lower(), _SKIP) for t in scene.types]
+    fills = []
+    for name in scene.colors:
+        rgba = QColor(name).rgba()      # недопустимый цвет рисуется чёрным — как на холсте
+        fill = f'fill="#{rgba & 0xffffff:06x}"'
+        alpha = rgba >> 24
+        fills.append(fill if alpha == 255 else f'{fill} fill-opacity="{alpha / 255:.3f}"')
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}">\n'
+            "<title>SLC Export</title>\n"
+            f'<rect width="{width}" height="{height}" fill="{QColor(BACKGROUND_COLOR).name()}"/>\n'
+            f'<g transform="scale({scale:g})">\n'
+        )
+        chunk = []
+        for kind, x, y, w, h, color in zip(scene.kind, scene.x, scene.y, scene.width, scene.height, scene.color):
+            kind = kinds[kind]
+            if kind == _SKIP or not w or not h:
+                continue
+            x, y = int(x), int(y)       # как при отрисовке (DisplayList)
+            if w < 0:
+                x, w = x + w, -w
+            if h < 0:
+                y, h = y + h, -h
+            if kind == _SQUARE:
+                chunk.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" {fills[color]}/>\n')
+            else:
+                chunk.append(
+                    f'<ellipse cx="{x + w / 2:g}" cy="{y + h / 2:g}" rx="{w / 2:g}" ry="{h / 2:g}" {fills[color]}/>\n'
+                )
+            if len(chunk) >= _SVG_CHUNK:
+                f.write("".join(chunk))
+                chunk.clear()
+        f.write("".join(chunk))
+        f.write("</g>\n</svg>\n")
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(renderer: SceneRenderer, path: str, width: int, height: int,
+              scale: float = 1.0, dpi: float = None, progress=None):
+    """Сцена в PNG width × height при масштабе scale, полосами по TILE_SIZE строк.
+
+    dpi записывается в чанк pHYs; progress(готово строк, всего строк) — после каждой полосы.
+    """
+    strip = QImage(width, TILE_SIZE, QImage.Format.Format_RGB32)
+    row_bytes = 3 * width
+    compressor = zlib.compressobj(_PNG_LEVEL)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        if dpi:
+            per_meter = round(dpi / 0.0254)
+            f.write(_png_chunk(b"pHYs", struct.pack(">IIB", per_meter, per_meter, 1)))
+
+        for row, top in enumerate(range(0, height, TILE_SIZE)):
+            painter = QPainter(strip)
+            for col in range((width + TILE_SIZE - 1) // TILE_SIZE):
+                painter.drawImage(col * TILE_SIZE, 0, renderer.tile(scale, col, row))
+            painter.end()
+
+            rgb = strip.convertToFormat(QImage.Format.Format_RGB888)
+            stride = rgb.bytesPerLine()
+            pixels = rgb.constBits().asstring(rgb.sizeInBytes())
+            rows = min(TILE_SIZE, height - top)
+            # фильтр 0 (None) перед каждой строкой
+            raw = b"".join([b"\0" + pixels[y * stride:y * stride + row_bytes] for y in range(rows)])
+            data = compressor.compress(raw)
+            if data:
+                f.write(_png_chunk(b"IDAT", data))
+            if progress is not None:
+                progress(top + rows, height)
+
+        f.write(_png_chunk(b"IDAT", compressor.flush()))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def export_scene(scene: Scene, path: str, scale: float = 1.0, dpi: float = None, size=None, progress=None):
+    """Сцена в .svg или .png по расширению; отрисовка точная, без уровня детализации.
+
+    size — (ширина, высота) картинки, по умолчанию вся сцена при масштабе scale. Возвращает размер.
+    """
+    width, height = size or scene_size(scene, scale)
+    if path.lower().endswith(".svg"):
+        write_svg(scene, path, width, height, scale)
+    else:
+        write_png(SceneRenderer(scene, exact=True), path, width, height, scale, dpi, progress)
+    return width, height
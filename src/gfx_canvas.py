@@ -1,43 +1,551 @@
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtGui import QPainter, QColor, QBrush, QPixmap
-from PyQt6.QtCore import QRect
+from PyQt6.QtGui import QPainter, QColor, QBrush, QImage
+from PyQt6.QtCore import Qt, QPointF, QRect, pyqtSignal
+from PyQt6 import sip
 import os
-from PyQt6.QtWidgets import QFileDialog
-from PyQt6.QtSvg import QSvgGenerator
+import threading
+from array import array
+from PyQt6.QtWidgets import QFileDialog, QInputDialog, QToolTip
+from src.scene import Scene
+from src.spatial_index import GridIndex
+from src import lod
+from src.scene_diff import changed_boxes
+from src.tile_cache import TileCache
+from src.workers import Job
 
+BACKGROUND_COLOR = "#1E1E1E"
+TILE_SIZE = 256
+ZOOM_STEPS = 4                  # ступеней колёсика на удвоение масштаба
+MIN_ZOOM_LEVEL, MAX_ZOOM_LEVEL = -40, 24
+_CLICK_SLOP = 4                 # пикселей: нажатие и отпускание ближе — щелчок, а не панорама
+
+
+# Вид фигуры в списке отрисовки
+_SKIP, _SQUARE, _CIRCLE = 0, 1, 2
+_SHAPE_KINDS = {"square": _SQUARE, "circle": _CIRCLE}
+
+# === Пакетная отрисовка ===
+# Пакеты окупаются, когда большая часть сцены рисуется повторно (обзор, плитки при
+# отдалении): тогда фигуры вне области отсекает уже сам Qt, а не цикл Python.
+# План пакетов строится со второй такой отрисовки — разовый рендер его не ждёт.
+_BATCH_MIN_SHAPES = 2000
+_BATCH_FRACTION = 4             # пакеты, если видна хотя бы 1/4 сцены
+_BATCH_CELL_CAP = 8             # столько фигур в клетке проверяются на пересечение точно
+_BATCH_MAX_CELLS = 64           # фигура крупнее — конфликтует со всем, что было до неё
+
+
+class DisplayList:
+    """Сцена, один раз подготовленная к отрисовке.
+
+    Кисти создаются по одной на цвет, координаты уже целые, тип фигуры — код
+    _SQUARE/_CIRCLE. paint() только проигрывает список и меняет кисть лишь
+    при смене цвета. Список строится заново, только когда меняется сцена.
+    """
+
+    def __init__(self, scene: Scene):
+        kinds = [_SHAPE_KINDS.get(t.lower(), _SKIP) for t in scene.types]
+        self.brushes = [QBrush(QColor(c)) for c in scene.colors]
+        self.kind = array("B", [kinds[k] for k in scene.kind])
+        self.x = lod.int_column(scene.x)
+        self.y = lod.int_column(scene.y)
+        self.width = scene.width
+        self.height = scene.height
+        self.color = scene.color
+        self.batches = None             # [(вид, кисть, QRect-ы или индексы)], см. _plan_batches
+        self._large_paints = 0
+        self._plan_lock = threading.Lock()  # плитки рисуются из нескольких потоков
+
+    def paint(self, painter: QPainter, indexes=None):
+        """Рисует все фигуры или только indexes (в порядке возрастания)"""
+        painter.setPen(QColor("#00000000"))
+        n = len(self.kind)
+        if n >= _BATCH_MIN_SHAPES and (indexes is None or len(indexes) * _BATCH_FRACTION >= n):
+            self._large_paints += 1
+            if self.batches is None and self._large_paints > 1:
+                with self._plan_lock:
+                    if self.batches is None:
+                        self.batches = self._plan_batches()
+            if self.batches:
+                self._paint_batches(painter)
+                return
+        brushes = self.brushes
+        draw_rect, draw_ellipse, set_brush = painter.drawRect, painter.drawEllipse, painter.setBrush
+        columns = (self.kind, self.x, self.y, self.width, self.height, self.color)
+        if indexes is None:
+            rows = zip(*columns)
+        else:
+            k, xs, ys, ws, hs, cs = columns
+            rows = ((k[i], xs[i], ys[i], ws[i], hs[i], cs[i]) for i in indexes)
+        last_color = -1
+        for kind, x, y, width, height, color in rows:
+            if kind == _SKIP:
+                continue
+            if color != last_color:
+                set_brush(brushes[color])
+                last_color = color
+            if kind == _SQUARE:
+                draw_rect(x, y, width, height)
+            else:
+                draw_ellipse(x, y, width, height)
+
+    def _paint_batches(self, painter: QPainter):
+        set_brush, draw_rects, draw_ellipse = painter.setBrush, painter.drawRects, painter.drawEllipse
+        xs, ys, ws, hs = self.x, self.y, self.width, self.height
+        for kind, brush, shapes in self.batches:
+            set_brush(brush)
+            if kind == _SQUARE:
+                draw_rects(shapes)
+            else:
+                for i in shapes:
+                    draw_ellipse(xs[i], ys[i], ws[i], hs[i])
+
+    def _plan_batches(self):
+        """Группирует фигуры в пакеты по (вид, цвет), не меняя итогового наложения.
+
+        Фигура уходит в последний пакет своего (вид, цвет), если позже него не открывался
+        пакет с пересекающейся с ней фигурой; иначе открывает новый пакет в конце. Пересечения
+        ищутся по сетке точно, а в переполненных клетках — консервативно, по максимуму пакета.
+        Квадраты пакета собираются в один sip.array QRect для drawRects.
+        Возвращает [] (рисовать по одной фигуре), если координаты не влезают в QRect.
+        """
+        n = len(self.kind)
+        kind, color = self.kind, self.color
+        left, right, top, bottom = [0] * n, [0] * n, [0] * n, [0] * n
+        quads = array("i")              # QRect в памяти — x1, y1, x2 = x + w - 1, y2 = y + h - 1
+        total = 0
+        try:
+            for i, (x, y, w, h) in enumerate(zip(self.x, self.y, self.width, self.height)):
+                quads.extend((x, y, x + w - 1, y + h - 1))
+                # как рисует Qt: [x, x + w) или [x + w, x) при отрицательной ширине
+                left[i], right[i] = (x, x + w) if w >= 0 else (x + w, x)
+                top[i], bottom[i] = (y, y + h) if h >= 0 else (y + h, y)
+                total += w if w >= h else h
+        except OverflowError:
+            return []
+        quads = quads.tobytes()
+        cell = max(8, min(512, 2 * total // n))
+
+        keys = []                       # пакет → (вид, цвет)
+        batch_of = [-1] * n
+        open_batch = {}                 # (вид, цвет) → последний пакет
+        cells = {}                      # (строка << 32) + колонка → [максимум свёрнутых, фигуры]
+        floor = -1                      # пакет последней крупной фигуры
+        for i in range(n):
+            k = kind[i]
+            if k == _SKIP:
+                continue
+            l, r, t, b = left[i], right[i], top[i], bottom[i]
+            c0, r0 = l // cell, t // cell
+            c1, r1 = max(l, r - 1) // cell, max(t, b - 1) // cell
+            if c0 == c1 and r0 == r1:
+                covered = ((r0 << 32) + c0,)
+            elif (c1 - c0 + 1) * (r1 - r0 + 1) > _BATCH_MAX_CELLS:
+                covered = None
+            else:
+                covered = [(row << 32) + col for row in range(r0, r1 + 1) for col in range(c0, c1 + 1)]
+
+            if covered is None:
+                after = len(keys) - 1
+            else:
+                after = floor
+                for c in covered:
+                    state = cells.get(c)
+                    if state is None:
+                        continue
+                    if state[0] > after:
+                        after = state[0]
+                    for j in state[1]:
+                        bj = batch_of[j]
+                        if bj > after and left[j] < r and l < right[j] and top[j] < b and t < bottom[j]:
+                            after = bj
+            key = (k, color[i])
+            batch = open_batch.get(key, -1)
+            if batch < 0 or batch < after:
+                batch = open_batch[key] = len(keys)
+                keys.append(key)
+            batch_of[i] = batch
+
+            if covered is None:
+                floor = batch
+                continue
+            for c in covered:
+                state = cells.get(c)
+                if state is None:
+                    cells[c] = [-1, [i]]
+                else:
+                    shapes = state[1]
+                    shapes.append(i)
+                    if len(shapes) > _BATCH_CELL_CAP:
+                        state[0] = max(state[0], max([batch_of[j] for j in shapes]))
+                        state[1] = []
+
+        members = [[] for _ in keys]
+        for i, batch in enumerate(batch_of):
+            if batch >= 0:
+                members[batch].append(i)
+        batches = []
+        for (k, c), shapes in zip(keys, members):
+            if k == _SQUARE:
+                rects = sip.array(QRect, len(shapes))
+                memoryview(rects)[:] = b"".join([quads[16 * i:16 * i + 16] for i in shapes])
+                shapes = rects
+            batches.append((k, self.brushes[c], shapes))
+        return batches
+
+
+def _blend(rgba: int, background: int) -> int:
+    """Цвет rgba, наложенный на непрозрачный фон, как его нарисует QPainter"""
+    alpha = rgba >> 24
+    out = 0xff000000
+    for shift in (16, 8, 0):
+        fg, bg = (rgba >> shift) & 0xff, (background >> shift) & 0xff
+        out |= (fg * alpha + bg * (255 - alpha) + 127) // 255 << shift
+    return out
+
+
+class SceneRenderer:
+    """Сцена, подготовленная к отрисовке плитками: DisplayList, LodScene или GridIndex.
+
+    Строится в рабочем потоке и дальше только читается, поэтому tile() можно
+    вызывать из нескольких потоков сразу.
+    """
+
+    def __init__(self, gfx_objects, exact: bool = False):
+        # принимает Scene или прежний список словарей; exact — без уровня детализации (экспорт)
+        self.scene = gfx_objects if isinstance(gfx_objects, Scene) else Scene.from_objects(gfx_objects)
+        self.display_list = DisplayList(self.scene)
+        self.lod = None                 # LodScene для больших сцен
+        self.index = None               # GridIndex для точной отрисовки
+        if not exact and lod.available() and len(self.scene) >= lod.LOD_MIN_SHAPES:
+            background = QColor(BACKGROUND_COLOR).rgba()
+            drawable = [_SHAPE_KINDS.get(t.lower(), _SKIP) != _SKIP for t in self.scene.types]
+            colors = [_blend(QColor(c).rgba(), background) for c in self.scene.colors]
+            self.lod = lod.LodScene(self.scene, drawable, colors, background)
+        else:
+            self.index = GridIndex(self.scene)
+
+    def tile(self, zoom: float, col: int, row: int) -> QImage:
+        """Плитка TILE_SIZE × TILE_SIZE масштабированной сцены (QImage: рисовать можно вне GUI)"""
+        left, top = col * TILE_SIZE, row * TILE_SIZE
+        if self.lod is not None:
+            # мелкие фигуры — растр LodScene, крупные — векторно поверх
+            raster, exact = self.lod.tile(zoom, left, top, TILE_SIZE)
+            image = QImage(raster.data, TILE_SIZE, TILE_SIZE, TILE_SIZE * 4, QImage.Format.Format_RGB32).copy()
+            if not len(exact):
+                return image
+            painter = QPainter(image)
+            painter.translate(-left, -top)
+            painter.scale(zoom, zoom)
+            self.display_list.paint(painter, exact.tolist())
+        else:
+            image = QImage(TILE_SIZE, TILE_SIZE, QImage.Format.Format_RGB32)
+            image.fill(QColor(BACKGROUND_COLOR))
+            painter = QPainter(image)
+            painter.translate(-left, -top)
+            self.paint_view(painter, zoom, left, top, TILE_SIZE, TILE_SIZE)
+        painter.end()
+        return image
+
+    def hit(self, x: float, y: float) -> int:
+        """Верхняя (нарисованная последней) фигура под точкой сцены (x, y) или -1"""
+        candidates = self.lod.at(x, y) if self.lod is not None else self.index.at(x, y)
+        dl = self.display_list
+        for i in reversed(candidates):
+            kind = dl.kind[i]
+            if kind == _SKIP:
+                continue
+            if kind == _CIRCLE:
+                rx, ry = dl.width[i] / 2, dl.height[i] / 2
+                dx, dy = (x - dl.x[i] - rx) / rx, (y - dl.y[i] - ry) / ry
+                if dx * dx + dy * dy > 1:
+                    continue
+            return i
+        return -1
+
+    def paint_view(self, painter: QPainter, zoom: float, left: int, top: int, width: int, height: int):
+        """Фигуры, попадающие в прямоугольник в координатах масштабированной сцены, точно"""
+        if self.index is None:
+            self.index = GridIndex(self.scene)
+        painter.scale(zoom, zoom)
+        # запас в пиксель: края фигур при дробном масштабе
+        visible = self.index.query((left - 1) / zoom, (top - 1) / zoom,
+                                   (left + width + 1) / zoom, (top + height + 1) / zoom)
+        self.display_list.paint(painter, visible)
+
+
+def _updated_renderer(old_scene: Scene, gfx_objects):
+    """Для GFXCanvas.update_scene (в пуле потоков): новый SceneRenderer и изменённые прямоугольники"""
+    renderer = SceneRenderer(gfx_objects)
+    return renderer, changed_boxes(old_scene, renderer.scene)
 
 
 class GFXCanvas(QWidget):
-    def __init__(self, gfx_objects):
+    shapeActivated = pyqtSignal(int)    # щелчок по фигуре: её индекс в self.scene
+
+    def __init__(self, gfx_objects=None):
         super().__init__()
-        self.objects = gfx_objects
+        self.scene = None
+        self.renderer = None            # SceneRenderer, готовится в пуле потоков
+        self.generation = 0             # растёт с каждой сценой: старые результаты отбрасываются
+        self.tiles = TileCache()
+        self.zoom_level = 0             # масштаб 2 ** (zoom_level / ZOOM_STEPS)
+        self.pan_x = self.pan_y = 0     # сдвиг вида в пикселях масштабированной сцены
+        self._jobs = {}                 # ключ → Job: подготовка сцены и недорисованные плитки
+        self._drag_from = None
+        self._press_at = None           # где нажата кнопка: щелчок, если мышь почти не сдвинулась
+        self._hover = -1                # фигура под курсором (подсказка)
+        self.setMouseTracking(True)
         self.setMinimumSize(400, 400)
-        self.setStyleSheet("background-color:#1E1E1E; border:1px solid #333;")
+        self.setStyleSheet(f"background-color:{BACKGROUND_COLOR}; border:1px solid #333;")
+        if gfx_objects is not None:
+            self.set_scene(gfx_objects)
 
+    # === Отрисовка плитками в фоне ===
+    # Видимая область собирается из плиток TILE_SIZE × TILE_SIZE, отрисованных при
+    # данном масштабе. Недостающие плитки рисуются в пуле потоков (Job), а пока их
+    # нет — на их месте фон; готовая плитка попадает в кэш и перерисовывает только
+    # свой прямоугольник. Панорама копирует готовые плитки из кэша.
     def paintEvent(self, event):
         painter = QPainter(self)
-        for obj in self.objects:
-            style = obj.get("style", {})
-            params = obj.get("params", {})
-            color = QColor(style.get("color", "#FFFFFF"))
-            width = int(style.get("width", 50))
-            height = int(style.get("height", 50))
-            x = params.get("x", 0)
-            y = params.get("y", 0)
+        rect = event.rect()
+        background = QColor(BACKGROUND_COLOR)
+        if self.renderer is None:
+            painter.fillRect(rect, background)
+            if self._jobs:
+                painter.setPen(QColor("#888888"))
+                painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "⏳ Отрисовка…")
+            return
+        size = TILE_SIZE
+        pan_x, pan_y = self.pan_x, self.pan_y
+        for row in range((rect.top() + pan_y) // size, (rect.bottom() + pan_y) // size + 1):
+            for col in range((rect.left() + pan_x) // size, (rect.right() + pan_x) // size + 1):
+                tile = self.tiles.get((self.zoom_level, col, row))
+                if tile is None:
+                    self._request_tile(col, row)
+                    painter.fillRect(col * size - pan_x, row * size - pan_y, size, size, background)
+                else:
+                    painter.drawImage(col * size - pan_x, row * size - pan_y, tile)
 
-            painter.setBrush(QBrush(color))
-            painter.setPen(QColor("#00000000"))
+    def _request_tile(self, col: int, row: int):
+        key = (self.generation, self.zoom_level, col, row)
+        if key in self._jobs:
+            return
+        job = Job(key, self.renderer.tile, self.zoom, col, row)
+        job.signals.done.connect(self._tile_ready)
+        job.signals.failed.connect(self._job_failed)
+        self._jobs[key] = job
+        job.start()
 
-            if obj["type"].lower() == "square":
-                painter.drawRect(QRect(x, y, width, height))
-            elif obj["type"].lower() == "circle":
-                painter.drawEllipse(x, y, width, height)
+    def _tile_ready(self, key, image: QImage):
+        if self._jobs.pop(key, None) is None:
+            return                      # отменена: другая сцена или масштаб
+        _, level, col, row = key
+        self.tiles.put((level, col, row), image)
+        self.update(col * TILE_SIZE - self.pan_x, row * TILE_SIZE - self.pan_y, TILE_SIZE, TILE_SIZE)
 
+    def _renderer_ready(self, key, renderer: SceneRenderer):
+        self._renderer_updated(key, (renderer, None))
 
+    def _renderer_updated(self, key, result):
+        if self._jobs.pop(key, None) is None:
+            return
+        renderer, boxes = result
+        self._cancel_tiles()            # недорисованные плитки — ещё от прежней сцены
+        self.renderer = renderer
+        self.scene = renderer.scene
+        self._hover = -1
+        if renderer.lod is not None and not renderer.lod.has_point_grid:
+            # индекс для поиска фигур под курсором — после первого кадра, отдельной задачей
+            job = Job(("points", self.generation), renderer.lod.build_point_grid)
+            job.signals.done.connect(self._job_done)
+            job.signals.failed.connect(self._job_failed)
+            self._jobs[job.key] = job
+            job.start()
+        if boxes is None:
+            self.tiles.clear()
+            self.update()
+        else:
+            self._invalidate(boxes)
 
+    def _job_done(self, key, result):
+        self._jobs.pop(key, None)
+
+    def _job_failed(self, key, error):
+        if self._jobs.pop(key, None) is not None:
+            print(f"⚠️ Ошибка отрисовки: {error}")
+
+    def cancel(self):
+        """Отменяет подготовку сцены и все недорисованные плитки"""
+        for job in self._jobs.values():
+            job.cancel()
+        self._jobs.clear()
+
+    def _cancel_tiles(self):
+        for key in [k for k in self._jobs if len(k) == 4]:
+            self._jobs.pop(key).cancel()
+
+    @property
+    def zoom(self) -> float:
+        return 2 ** (self.zoom_level / ZOOM_STEPS)
+
+    def set_scene(self, gfx_objects):
+        """Новая сцена (Scene или список словарей): готовится в фоне, старая отрисовка отменяется"""
+        self.cancel()
+        self.scene = gfx_objects if isinstance(gfx_objects, Scene) else None
+        self.renderer = None
+        self.tiles.clear()
+        self._start_scene_job(self._renderer_ready, SceneRenderer, gfx_objects)
+        self.update()
+
+    def update_scene(self, gfx_objects):
+        """Следующая версия сцены: пока она готовится, виден прежний кадр, а затем
+        перерисовываются только плитки, задетые изменёнными фигурами (сравнение по именам)"""
+        if self.renderer is None:
+            self.set_scene(gfx_objects)
+            return
+        self.cancel()
+        self._start_scene_job(self._renderer_updated, _updated_renderer, self.renderer.scene, gfx_objects)
+
+    def _invalidate(self, boxes):
+        """Выбрасывает из кэша плитки всех масштабов, задевающие прямоугольники сцены boxes"""
+        size = TILE_SIZE
+        cached = self.tiles.keys()
+        for level in {key[0] for key in cached}:
+            zoom = 2 ** (level / ZOOM_STEPS)
+            stale = set()
+            for left, top, right, bottom in boxes:
+                # запас в пиксель, как в paint_view
+                c0, c1 = int((left * zoom - 1) // size), int((right * zoom + 1) // size)
+                r0, r1 = int((top * zoom - 1) // size), int((bottom * zoom + 1) // size)
+                if (c1 - c0 + 1) * (r1 - r0 + 1) > len(cached):
+                    stale.update(k for k in cached if k[0] == level and c0 <= k[1] <= c1 and r0 <= k[2] <= r1)
+                else:
+                    stale.update((level, col, row) for row in range(r0, r1 + 1) for col in range(c0, c1 + 1))
+            for key in stale:
+                if key in self.tiles:
+                    self.tiles.discard(key)
+                    if level == self.zoom_level:
+                        self.update(key[1] * size - self.pan_x, key[2] * size - self.pan_y, size, size)
+
+    def _start_scene_job(self, slot, fn, *args):
+        self.generation += 1
+        key = ("scene", self.generation)
+        job = Job(key, fn, *args)
+        job.signals.done.connect(slot)
+        job.signals.failed.connect(self._job_failed)
+        self._jobs[key] = job
+        job.start()
+
+    def _renderer_now(self) -> SceneRenderer:
+        """SceneRenderer сейчас же: если фоновая подготовка не закончена, строим здесь"""
+        if self.renderer is None:
+            job = self._jobs.pop(("scene", self.generation), None)
+            if job is None:
+                return None
+            job.cancel()
+            self.renderer = job.fn(*job.args)
+            self.scene = self.renderer.scene
+        return self.renderer
+
+    # === Масштаб и панорама ===
+    def zoom_at(self, steps: int, x: int, y: int):
+        """Меняет масштаб на steps ступеней, оставляя точку (x, y) виджета на месте"""
+        level = max(MIN_ZOOM_LEVEL, min(MAX_ZOOM_LEVEL, self.zoom_level + steps))
+        if level == self.zoom_level:
+            return
+        self._cancel_tiles()            # плитки прежнего масштаба уже не нужны
+        old_zoom = self.zoom
+        self.zoom_level = level
+        factor = self.zoom / old_zoom
+        self.pan_x = round((x + self.pan_x) * factor - x)
+        self.pan_y = round((y + self.pan_y) * factor - y)
+        self.update()
+
+    def reset_view(self):
+        if self.zoom_level != 0:
+            self._cancel_tiles()
+        self.zoom_level = 0
+        self.pan_x = self.pan_y = 0
+        self.update()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() // 120
+        if steps:
+            pos = event.position()
+            self.zoom_at(steps, int(pos.x()), int(pos.y()))
+
+    def mousePressEvent(self, event):
+        self._drag_from = self._press_at = event.position()
+
+    def mouseMoveEvent(self, event):
+        pos = event.position()
+        if self._drag_from is None:
+            self._show_hover(pos, event.globalPosition().toPoint())
+            return
+        dx, dy = int(pos.x() - self._drag_from.x()), int(pos.y() - self._drag_from.y())
+        if dx or dy:
+            self.pan_x -= dx
+            self.pan_y -= dy
+            self._drag_from = QPointF(self._drag_from.x() + dx, self._drag_from.y() + dy)
+            self.scroll(dx, dy)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_from = None
+        press, self._press_at = self._press_at, None
+        if press is not None and (event.position() - press).manhattanLength() < _CLICK_SLOP:
+            index = self.shape_at(event.position())
+            if index >= 0:
+                self.shapeActivated.emit(index)
+
+    # === Фигуры под курсором ===
+    def shape_at(self, pos: QPointF) -> int:
+        """Индекс верхней фигуры под точкой виджета или -1 (через пространственный индекс)"""
+        if self.renderer is None:
+            return -1
+        zoom = self.zoom
+        return self.renderer.hit((pos.x() + self.pan_x) / zoom, (pos.y() + self.pan_y) / zoom)
+
+    def _show_hover(self, pos: QPointF, global_pos):
+        index = self.shape_at(pos)
+        if index == self._hover:
+            return
+        self._hover = index
+        if index < 0:
+            QToolTip.hideText()
+            return
+        obj = self.renderer.scene[index]
+        params = ", ".join(f"{key}: {value}" for key, value in obj["params"].items())
+        QToolTip.showText(global_pos, f"{obj['type']} {obj['name']}({params})", self)
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
+
+    def grab_view(self) -> QImage:
+        """Текущий вид целиком, не дожидаясь фона: недостающие плитки рисуются здесь же"""
+        image = QImage(self.size(), QImage.Format.Format_RGB32)
+        image.fill(QColor(BACKGROUND_COLOR))
+        renderer = self._renderer_now()
+        if renderer is None:
+            return image
+        painter = QPainter(image)
+        size = TILE_SIZE
+        pan_x, pan_y = self.pan_x, self.pan_y
+        for row in range(pan_y // size, (self.height() - 1 + pan_y) // size + 1):
+            for col in range(pan_x // size, (self.width() - 1 + pan_x) // size + 1):
+                key = (self.zoom_level, col, row)
+                tile = self.tiles.get(key)
+                if tile is None:
+                    tile = renderer.tile(self.zoom, col, row)
+                    self.tiles.put(key, tile)
+                painter.drawImage(col * size - pan_x, row * size - pan_y, tile)
+        painter.end()
+        return image
 
     def export_image(self, parent=None):
-        """Сохраняет содержимое Canvas в PNG / JPG / SVG"""
+        """Сохраняет сцену: PNG — целиком в выбранном масштабе, SVG — целиком векторно, JPG — текущий вид.
+
+        PNG и SVG пишутся потоком в файл в пуле потоков (src/export.py).
+        """
         file_path, _ = QFileDialog.getSaveFileName(
             parent,
             "Сохранить как изображение",
@@ -47,24 +555,27 @@ class GFXCanvas(QWidget):
         if not file_path:
             return
 
+        renderer = self._renderer_now()
+        if renderer is None:
+            return
+
         # Определяем формат
         ext = os.path.splitext(file_path)[1].lower()
 
-        if ext in [".png", ".jpg", ".jpeg"]:
-            pixmap = QPixmap(self.size())
-            self.render(pixmap)
-            pixmap.save(file_path)
+        if ext in [".jpg", ".jpeg"]:
+            self.grab_view().save(file_path)
             print(f"🖼 Сохранено как {file_path}")
+            return
+
+        scale = 1.0
+        if ext != ".svg":
+            scale, ok = QInputDialog.getDouble(parent, "Экспорт PNG", "Масштаб (1 — 100%):", 1.0, 0.05, 100.0, 2)
+            if not ok:
+                return
+        from src.export import export_scene
 
-        elif ext == ".svg":
-            generator = QSvgGenerator()
-            generator.setFileName(file_path)
-            generator.setSize(self.size())
-            generator.setViewBox(QRect(0, 0, self.width(), self.height()))
-            generator.setTitle("SLC Export")
-            generator.setDescription("Generated from SLC Canvas")
-
-            painter = QPainter(generator)
-            self.render(painter)
-            painter.end()
-            print(f"📐 Сохранено как SVG: {file_path}")            
+        job = Job(file_path, export_scene, renderer.scene, file_path, scale)
+        job.signals.done.connect(lambda path, size: print(f"🖼 Сохранено как {path} ({size[0]}×{size[1]})"))
+        job.signals.failed.connect(lambda path, error: print(f"⚠️ Ошибка экспорта {path}: {error}"))
+        job.start()
+        print(f"⏳ Экспорт в {file_path}…")
@@ -1,108 +1,462 @@
+import mmap
 import os
 import re
+from collections import deque
+
+from src.scene import Scene
+from src.slc_lexer import SLCLexer, LineIndex
+
+# Меняется при любом изменении результата разбора (ключ кэша .slc_cache)
+PARSER_VERSION = 3
+
+_NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+_QUOTED_RE = re.compile(r"^['\"].*['\"]$")
+_NON_SPACE_RE_BYTES = re.compile(rb"\S")
+_LINE_COUNT_CHUNK = 1 << 20
+# _create в режиме восстановления: заголовок фигуры без '{' — его '}' закроет «пустой» блок
+_MISSING_BRACE = object()
+
+
+class ShapeNode:
+    """Узел AST: заголовок `Create <Type> <Name>(...) {` и границы его блока"""
+    __slots__ = ("type", "name", "name_start", "params", "params_start", "start", "header_end", "end",
+                 "is_shape", "is_list", "style")
+
+    def __init__(self, type_, name, name_start, params, params_start, start, header_end, is_shape, is_list):
+        self.type = type_
+        self.name = name
+        self.name_start = name_start
+        self.params = params            # сырой текст между скобками
+        self.params_start = params_start
+        self.start = start              # позиция 'Create'
+        self.header_end = header_end    # позиция после '{'
+        self.end = None                 # позиция после закрывающей '}' (None — не закрыт)
+        self.is_shape = is_shape        # заголовок фигуры: Create Type Name(...) {
+        self.is_list = is_list          # объявление списка: Create List Name() {
+        self.style = None               # StyleNode, из которого взят стиль объекта
+
+
+class StyleNode:
+    """Блок `Style { ... }` и его сырое тело"""
+    __slots__ = ("start", "end", "body")
+
+    def __init__(self, start, end, body):
+        self.start = start
+        self.end = end
+        self.body = body
+
 
 class GFXParser:
     def __init__(self, code: str, filename: str = None):
         self.code = code.strip()
         self.objects = []
+        self.nodes = []
+        self.spans = []                 # (начало, конец) заголовка Create каждого объекта в исходном тексте
         self.filename = os.path.splitext(os.path.basename(filename))[0] if filename else None
         self.used_shape_names = set()
+        self.diagnostics = None         # список при parse_with_diagnostics(), иначе ошибка — SyntaxError
+        self._lines = None
+        # срезанное strip() начало: чтобы диагностики указывали на строки исходного текста
+        lead = code[:len(code) - len(code.lstrip())]
+        self._lead = len(lead)
+        self._lead_lines = lead.count("\n")
+        self._lead_col = len(lead) - lead.rfind("\n") - 1
 
     def parse(self):
         """Парсит код SLC и проверяет все имена"""
         self.objects.clear()
-        
+        self._parse(self.objects.append)
+        return self.objects
+
+    def parse_scene(self) -> Scene:
+        """То же, что parse(), но сразу в компактную Scene без списка словарей"""
+        self.objects.clear()
+        scene = Scene()
+        self._parse(scene.append)
+        scene.spans = self.spans
+        return scene
+
+    def parse_with_diagnostics(self):
+        """Разбор с восстановлением после ошибок: все проблемы за один проход.
+
+        Ошибочные фигуры пропускаются, разбор продолжается со следующего Create или '}'.
+        Возвращает (объекты, диагностики), диагностика — {"line", "col", "length", "message"}
+        с позицией в исходном тексте.
+        """
+        self.objects.clear()
+        self.diagnostics = []
+        try:
+            self._parse(self.objects.append)
+            diagnostics = sorted(self.diagnostics, key=lambda d: (d["line"], d["col"]))
+        finally:
+            self.diagnostics = None
+        return self.objects, diagnostics
+
+    def _parse(self, append):
+        """Разбор и проверки; каждый готовый объект фигуры передаётся в append"""
+        self.nodes = []
+        self.spans = []
+        self.used_shape_names = set()
+
         if not self.code:
             print("📄 Пустой файл — ничего не парсим.")
-            return []
+            return
+
+        # === Один проход по тексту: заголовки и блоки Style ===
+        headers, styles = [], []
+        for item in self._walk(SLCLexer(self.code)):
+            (headers if item.__class__ is ShapeNode else styles).append(item)
 
         # === Проверка блока Create List ===
-        list_match = re.search(r"Create\s+List\s+([A-Za-z_]\w*)\s*\(\)\s*{", self.code)
-        if not list_match:
-            raise SyntaxError("❌ Ожидалось объявление 'Create List <Name>() {'")
+        self._check_list(next((n for n in headers if n.is_list), None))
+
+        # === Проверка фигур ===
+        shapes = [n for n in headers if n.is_shape]
+
+        if not shapes:
+            self._fail(
+                "❌ Не найдено фигур. Каждая фигура должна быть вида: 'Create ShapeType ShapeName(x:..., y:...) {'",
+                0, 1
+            )
+            return
+
+        # Style фигуры — первый блок Style после её заголовка (указатель только растёт)
+        style_i = 0
+        for node in shapes:
+            while style_i < len(styles) and styles[style_i].start < node.header_end:
+                style_i += 1
+            style_node = styles[style_i] if style_i < len(styles) else None
+            obj = self._build_object(node, style_node)
+            if obj is None:
+                continue
+            append(obj)
+            node.style = style_node
+            self.nodes.append(node)
+            self.spans.append((node.start + self._lead, node.header_end + self._lead))
 
-        list_name = list_match.group(1)
+    def _check_list(self, list_node):
+        if list_node is None:
+            return self._fail("❌ Ожидалось объявление 'Create List <Name>() {'", 0, 1)
+
+        list_name = list_node.name
+        name_at = (list_node.name_start, len(list_name))
 
         # 1️⃣ List должен быть с заглавной буквы
         if not list_name[0].isupper():
-            raise SyntaxError(f"❌ Имя списка '{list_name}' должно начинаться с большой буквы")
+            return self._fail(f"❌ Имя списка '{list_name}' должно начинаться с большой буквы", *name_at)
 
         # 2️⃣ List должен совпадать с именем файла
         if self.filename and list_name != self.filename:
-            raise SyntaxError(
-                f"❌ Имя списка '{list_name}' должно совпадать с именем файла '{self.filename}'"
+            return self._fail(
+                f"❌ Имя списка '{list_name}' должно совпадать с именем файла '{self.filename}'", *name_at
             )
 
-        # === Проверка фигур ===
-        shape_pattern = r"Create\s+([A-Z]\w*)\s+([A-Z]\w*)\s*\((.*?)\)\s*{"
-        shapes = list(re.finditer(shape_pattern, self.code))
+    def iter_mapped(self, mm):
+        """Потоковый parse() по байтам (mmap): объекты фигур выдаются по мере готовности.
 
-        if not shapes:
+        Фигура выдаётся, как только найден её Style (и уже проверен Create List), так что
+        в памяти держатся только ожидающие фигуры и множество имён. Ошибка поднимается
+        там, где обнаружена: при нескольких ошибках первой может оказаться не та,
+        что сообщит parse() (например, дубликат имени раньше пропущенного Style).
+        """
+        self.used_shape_names = set()
+        first = _NON_SPACE_RE_BYTES.search(mm)
+        if first is None:
+            print("📄 Пустой файл — ничего не парсим.")
+            return
+        self._lines = _MappedLines(mm, first.start())
+
+        list_node = None
+        found_shapes = False
+        pending = deque()   # [фигура, её Style] в порядке текста
+        for item in self._walk(SLCLexer(mm, first.start())):
+            if item.__class__ is ShapeNode:
+                if item.is_list and list_node is None:
+                    list_node = item
+                    self._check_list(list_node)
+                if item.is_shape:
+                    pending.append([item, None])
+                    found_shapes = True
+            else:
+                for entry in reversed(pending):
+                    if entry[1] is not None:
+                        break
+                    entry[1] = item
+            if list_node is not None:
+                while pending and pending[0][1] is not None:
+                    node, style_node = pending.popleft()
+                    yield self._build_object(node, style_node)
+
+        self._check_list(list_node)
+        if not found_shapes:
             raise SyntaxError(
                 "❌ Не найдено фигур. Каждая фигура должна быть вида: 'Create ShapeType ShapeName(x:..., y:...) {'"
             )
+        for node, style_node in pending:
+            yield self._build_object(node, style_node)
 
-        for match in shapes:
-            shape_type = match.group(1)
-            shape_name = match.group(2)
-            params_str = match.group(3)
-
-            # 1️⃣ Имя фигуры обязательно
-            if not shape_name:
-                line = self._find_line(match.start())
-                raise SyntaxError(f"❌ У фигуры '{shape_type}' отсутствует имя (строка {line})")
-
-            # 2️⃣ Имя фигуры не 'List'
-            if shape_name.lower() == "list":
-                line = self._find_line(match.start())
-                raise SyntaxError(f"❌ Имя фигуры не может быть 'List' (строка {line})")
-
-            # 3️⃣ Имя с большой буквы
-            if not shape_name[0].isupper():
-                line = self._find_line(match.start())
-                raise SyntaxError(f"❌ Имя фигуры '{shape_name}' должно начинаться с большой буквы (строка {line})")
-
-            # 4️⃣ Имя уникально
-            if shape_name in self.used_shape_names:
-                line = self._find_line(match.start())
-                raise SyntaxError(f"❌ Повторяющееся имя фигуры '{shape_name}' (строка {line})")
-
-            self.used_shape_names.add(shape_name)
-
-            # 5️⃣ Парсим параметры (без краша)
-            try:
-                params = self._parse_params(params_str)
-            except SyntaxError as e:
-                raise e
-            except Exception:
-                params = {}
-
-            # 6️⃣ Проверяем наличие блока Style
-            code_after = self.code[match.end():]
+    def parse_block(self):
+        """Разбирает текст ровно одного блока `Create <Type> <Name>(...) { ... }`.
+
+        Нужен для инкрементального обновления (см. SLCParseTree). Возвращает (ShapeNode, объект)
+        или None, если текст — не один замкнутый блок фигуры со своим Style внутри.
+        Ошибки самой фигуры — SyntaxError, как в parse(); уникальность имени не проверяется.
+        """
+        self.used_shape_names = set()
+        items = list(self._walk(SLCLexer(self.code)))
+        if not items:
+            return None
+        node = items[0]
+        if (node.__class__ is not ShapeNode or not node.is_shape or node.is_list
+                or node.start != 0 or node.end != len(self.code)):
+            return None
+        if any(item.__class__ is ShapeNode for item in items[1:]):
+            return None
+        if len(items) < 2:
+            return None
+        node.style = items[1]
+        return node, self._build_object(node, node.style)
+
+    def _build_object(self, node: ShapeNode, style_node):
+        """Проверяет одну фигуру и собирает её объект"""
+        shape_type = node.type
+        shape_name = node.name
+
+        name_at = (node.name_start, len(shape_name))
+
+        # 1️⃣ Имя фигуры обязательно
+        if not shape_name:
+            line = self._find_line(node.start)
+            return self._fail(f"❌ У фигуры '{shape_type}' отсутствует имя (строка {line})", node.start, 6)
+
+        # 2️⃣ Имя фигуры не 'List'
+        if shape_name.lower() == "list":
+            line = self._find_line(node.start)
+            return self._fail(f"❌ Имя фигуры не может быть 'List' (строка {line})", *name_at)
+
+        # 3️⃣ Имя с большой буквы
+        if not shape_name[0].isupper():
+            line = self._find_line(node.start)
+            return self._fail(
+                f"❌ Имя фигуры '{shape_name}' должно начинаться с большой буквы (строка {line})", *name_at
+            )
+
+        # 4️⃣ Имя уникально
+        if shape_name in self.used_shape_names:
+            line = self._find_line(node.start)
+            return self._fail(f"❌ Повторяющееся имя фигуры '{shape_name}' (строка {line})", *name_at)
+
+        self.used_shape_names.add(shape_name)
+
+        # 5️⃣ Парсим параметры (без краша)
+        try:
+            params = self._parse_params(node.params)
+        except SyntaxError as e:
+            return self._fail(str(e), node.params_start, len(node.params))
+        except Exception:
+            params = {}
+
+        # 6️⃣ Проверяем наличие блока Style
+        if style_node is None:
+            line = self._find_line(node.header_end)
+            return self._fail(
+                f"❌ Отсутствует блок 'Style {{ ... }}' после {shape_name} (строка {line})",
+                node.start, node.header_end - node.start
+            )
+
+        try:
+            style = self._parse_style(style_node.body)
+        except Exception:
             style = {}
-            style_match = re.search(r"Style\s*{([^}]*)}", code_after)
-            if not style_match:
-                line = self._find_line(match.end())
-                raise SyntaxError(f"❌ Отсутствует блок 'Style {{ ... }}' после {shape_name} (строка {line})")
-
-            try:
-                style = self._extract_style(code_after)
-            except Exception:
-                style = {}
-
-            # ✅ Добавляем объект в структуру (ключ 'type' обязателен!)
-            self.objects.append({
-                "type": shape_type,   # для gfx_canvas.py
-                "name": shape_name,
-                "params": params,
-                "style": style
-            })
 
-        return self.objects
+        # ✅ Объект фигуры (ключ 'type' обязателен!)
+        return {
+            "type": shape_type,   # для gfx_canvas.py
+            "name": shape_name,
+            "params": params,
+            "style": style
+        }
+
+    # === Рекурсивный спуск ===
+    #   document := item*
+    #   item     := create | style | '{' item* '}' | <любой токен>
+    #   create   := 'Create' IDENT IDENT '(' <параметры> ')' '{' item* '}'
+    #   style    := 'Style' '{' <тело без '}'> '}'
+    # Тело Style для вложенности блоков — текст: его скобки не открывают и не закрывают
+    # блоков. Но Create и Style в нём ищутся, как их находил прежний разбор регулярными
+    # выражениями по всему тексту; по той же причине видны Create List и Style внутри
+    # скобок заголовка фигуры (_header_items).
+    # Вложенность блоков ведётся явным стеком, а не рекурсией Python:
+    # у файла с сотнями незакрытых фигур глубина не упирается в recursion limit.
+    # В режиме восстановления нераспознанный Create/Style/'}' записывается в диагностики,
+    # а обход просто продолжается со следующего структурного токена.
+    def _walk(self, lexer: SLCLexer):
+        """Обходит текст один раз и по порядку выдаёт ShapeNode и StyleNode"""
+        stack = []      # открытые блоки Create (None — заголовок без '{')
+        depth = [0]     # глубина «простых» { } внутри каждого уровня
+        style_close = -1    # '}' тела последнего Style
+        while True:
+            tok = lexer.next_structural()
+            if tok is None:
+                break
+            value, start = tok
+            if value == "Create":
+                node = self._create(lexer, start)
+                if node is _MISSING_BRACE:
+                    stack.append(None)
+                    depth.append(0)
+                elif node is not None:
+                    if node.is_shape and ("Create" in node.params or "Style" in node.params):
+                        yield from self._header_items(lexer, node.params_start, node.header_end)
+                    yield node
+                    stack.append(node)
+                    depth.append(0)
+            elif value == "Style":
+                style = self._style(lexer, start)
+                if style is not None:
+                    yield style
+                    style_close = style.end - 1
+            elif start <= style_close:
+                continue        # скобка внутри тела Style
+            elif value == "{":
+                depth[-1] += 1
+            elif depth[-1]:
+                depth[-1] -= 1
+            elif stack:
+                node = stack.pop()
+                depth.pop()
+                if node is not None:
+                    node.end = lexer.pos
+            elif self.diagnostics is not None:
+                self._fail("❌ Лишняя '}'", start, 1)
+
+        if self.diagnostics is not None:
+            for node in stack:
+                if node is not None:
+                    self._fail(f"❌ Блок '{node.name}' не закрыт '}}'", node.start, node.header_end - node.start)
+
+    def _create(self, lexer: SLCLexer, start: int):
+        """create := 'Create' IDENT IDENT '(' <параметры в одну строку> ')' '{'"""
+        after_create = lexer.pos
+        header = lexer.header()
+        if header is None:
+            return self._bad_create("❌ Ожидалось 'Create <Тип> <Имя>(...) {'", start, 6)
+        type_, type_start, name, name_start, lparen = header
+        is_shape = "A" <= type_[0] <= "Z" and "A" <= name[0] <= "Z"
+        is_list = type_ == "List" and (name[0] == "_" or name[0].isascii() and name[0].isalpha())
+        if not (is_shape or is_list):
+            lexer.pos = after_create
+            if not "A" <= type_[0] <= "Z":
+                return self._bad_create(
+                    f"❌ Тип фигуры '{type_}' должен начинаться с большой буквы (строка {self._find_line(start)})",
+                    type_start, len(type_)
+                )
+            return self._bad_create(
+                f"❌ Имя фигуры '{name}' должно начинаться с большой буквы (строка {self._find_line(start)})",
+                name_start, len(name)
+            )
+
+        # Параметры — до первой ')' на той же строке, за которой идёт '{'
+        line_end = lexer.find("\n", lparen)
+        if line_end < 0:
+            line_end = lexer.end
+        close = lexer.find(")", lparen + 1, line_end)
+        while close >= 0:
+            header_end = lexer.open_brace(close + 1)
+            if header_end >= 0:
+                break
+            close = lexer.find(")", close + 1, line_end)
+        else:
+            lexer.pos = after_create
+            self._bad_create(
+                f"❌ Ожидается '{{' после команды Create (строка {self._find_line(start)})", start, line_end - start
+            )
+            # без '{' на строке заголовка его '}' ниже закроет «пустой» блок, а не родителя
+            if self.diagnostics is not None and lexer.find("{", lparen, line_end) < 0:
+                return _MISSING_BRACE
+            return None
+
+        # List требует пустых скобок '()' вплотную
+        is_list = is_list and close == lparen + 1
+        if not (is_shape or is_list):
+            lexer.pos = after_create
+            return self._bad_create("❌ Ожидалось объявление 'Create List <Name>() {'", start, 6)
+        lexer.pos = header_end
+        return ShapeNode(type_, name, name_start, lexer.slice(lparen + 1, close), lparen + 1,
+                         start, header_end, is_shape, is_list)
+
+    def _bad_create(self, message: str, start: int, length: int):
+        """Нераспознанный заголовок: в обычном режиме молча пропускается, как раньше"""
+        if self.diagnostics is not None:
+            self._fail(message, start, length)
+        return None
+
+    def _style(self, lexer: SLCLexer, start: int):
+        """style := 'Style' '{' <тело> '}'"""
+        body_start = lexer.open_brace(lexer.pos)
+        if body_start < 0:
+            if self.diagnostics is not None:
+                self._fail("❌ Пропущена '{' после Style", start, 5)
+            return None
+        close = lexer.find("}", body_start)
+        if close < 0:
+            if self.diagnostics is not None:
+                self._fail("❌ Блок Style не закрыт '}'", start, 5)
+            return None
+        body = lexer.slice(body_start, close)
+        # тело с Create или Style просматривается дальше, иначе пропускается целиком
+        lexer.pos = body_start if "Create" in body or "Style" in body else close + 1
+        return StyleNode(start, close + 1, body)
+
+    def _header_items(self, lexer: SLCLexer, start: int, end: int):
+        """Style и объявления Create List, начинающиеся в [start, end) — внутри заголовка фигуры.
+
+        Обход перескакивает заголовок целиком, но прежний разбор искал Style и
+        Create List по всему тексту: такой Style достаётся фигурам выше, а список
+        учитывается проверкой Create List. Фигур внутри заголовка не бывает.
+        """
+        inner = SLCLexer(lexer.text, start, lexer.end)
+        while True:
+            tok = inner.next_structural()
+            if tok is None or tok[1] >= end:
+                return
+            value, at = tok
+            if value == "Style":
+                body_start = inner.open_brace(inner.pos)
+                close = inner.find("}", body_start) if body_start >= 0 else -1
+                if close >= 0:
+                    yield StyleNode(at, close + 1, inner.slice(body_start, close))
+                    inner.pos = body_start
+            elif value == "Create":
+                header = inner.header()
+                if header is None:
+                    continue
+                type_, _, name, name_start, lparen = header
+                if (type_ == "List" and (name[0] == "_" or name[0].isascii() and name[0].isalpha())
+                        and inner.find(")", lparen + 1, lparen + 2) > 0):
+                    header_end = inner.open_brace(lparen + 2)
+                    if header_end >= 0:
+                        yield ShapeNode(type_, name, name_start, "", lparen + 1, at, header_end, False, True)
+                inner.pos = lparen + 1
 
     # === Вспомогательные методы ===
+    def _fail(self, message: str, start: int, length: int = 1):
+        """Ошибка в позиции start: SyntaxError или запись в диагностики в режиме восстановления"""
+        if self.diagnostics is None:
+            raise SyntaxError(message)
+        line = self._find_line(start)
+        col = self._lines.column(start)
+        if line == self._lead_lines + 1:
+            col += self._lead_col
+        self.diagnostics.append({"line": line, "col": col, "length": max(1, length), "message": message})
+        return None
+
     def _find_line(self, index: int) -> int:
-        return self.code.count("\n", 0, index) + 1
+        if self._lines is None:
+            self._lines = LineIndex(self.code)
+        line = self._lines.line(index)
+        # в режиме восстановления строки считаются по исходному тексту, до strip()
+        return line + self._lead_lines if self.diagnostics is not None else line
 
     def _parse_params(self, param_str: str):
         params = {}
@@ -115,12 +469,13 @@ class GFXParser:
                 continue
             if ":" not in p:
                 raise SyntaxError(f"❌ Неверный параметр: '{p}', ожидалось 'ключ:значение'")
-            k, v = [x.strip() for x in p.split(":", 1)]
+            k, _, v = p.partition(":")
+            k, v = k.strip(), v.strip()
 
             # тип значения
-            if re.match(r"^-?\d+(\.\d+)?$", v):
+            if _NUMBER_RE.match(v):
                 val = float(v) if "." in v else int(v)
-            elif re.match(r"^['\"].*['\"]$", v):
+            elif _QUOTED_RE.match(v):
                 val = v.strip("'\"")
             else:
                 raise SyntaxError(f"❌ Некорректное значение параметра '{k}': '{v}'")
@@ -128,14 +483,43 @@ class GFXParser:
 
         return params
 
-    def _extract_style(self, text: str):
+    def _parse_style(self, body: str):
         styles = {}
-        match = re.search(r"Style\s*{([^}]*)}", text)
-        if not match:
-            return styles
-        for line in match.group(1).split(";"):
+        for line in body.split(";"):
             if ":" in line:
-                k, v = [x.strip() for x in line.split(":", 1)]
+                k, _, v = line.partition(":")
+                k, v = k.strip(), v.strip()
                 if k and v:
                     styles[k] = v
         return styles
+
+
+class _MappedLines:
+    """Номер строки по смещению в mmap без таблицы строк (нужен только для текста ошибки)"""
+
+    def __init__(self, mm, first: int):
+        self.mm = mm
+        self.first = first
+
+    def line(self, index: int) -> int:
+        count, pos = 0, self.first
+        while pos < index:
+            end = min(index, pos + _LINE_COUNT_CHUNK)
+            count += self.mm[pos:end].count(b"\n")
+            pos = end
+        return count + 1
+
+
+def iter_shapes(path: str, filename: str = None):
+    """Потоково парсит .slc-файл из mmap, не загружая текст целиком, и выдаёт объекты фигур.
+
+    filename включает проверку имени списка, как в GFXParser. Например:
+        scene = Scene.from_objects(iter_shapes("big.slc"))
+    """
+    parser = GFXParser("", filename)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            print("📄 Пустой файл — ничего не парсим.")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from parser.iter_mapped(mm)
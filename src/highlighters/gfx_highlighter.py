@@ -1,5 +1,36 @@
+import re
+
 from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
-from PyQt6.QtCore import QRegularExpression
+
+from src.highlighters.span_cache import SPAN_CACHE
+
+# === Токены SLC ===
+# Одна регулярка-альтернатива: за один проход по строке каждый символ попадает
+# не больше чем в один токен. Порядок ветвей — приоритет: у правил, которые раньше
+# применялись по очереди (побеждало последнее), здесь первым стоит победитель.
+_TOKEN_RE = re.compile(
+    r"(?P<braces>[{}()])"
+    r"|(?P<number>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<hash>#(?=\d{3,6}\b))"          # «#123456»: цифры подсвечивались как число
+    r"|(?P<swatch>(?P<swatch_color>#[A-Fa-f]{3,6}\b)\s*:)"     # «#abc:» — цвет, а «:» как у параметра
+    r"|(?P<color>#[0-9A-Fa-f]{3,6}\b)"
+    r"|(?P<param>\b[a-zA-Z_]+\s*:)"
+    r"|(?P<keyword>\b(?:Square|Circle|Join|Package)\b)"
+    r"|(?P<style>\bStyle\b)"
+    r"|(?P<list>\bList\b)"
+    r"|(?P<create>\bCreate\b)",
+    re.ASCII,       # \b, \d, \s — как в QRegularExpression по умолчанию
+)
+# символы вне BMP: в документе Qt (UTF-16) они занимают две позиции
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def _format(color: str, bold: bool = False) -> QTextCharFormat:
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color))
+    if bold:
+        fmt.setFontWeight(QFont.Weight.Bold)
+    return fmt
 
 
 class GFXHighlighter(QSyntaxHighlighter):
@@ -7,60 +38,66 @@ class GFXHighlighter(QSyntaxHighlighter):
         super().__init__(document)
         print("🟢 GFXHighlighter init started")
 
-        self.rules = []
-
         # === Форматы ===
-        create_fmt = QTextCharFormat()
-        create_fmt.setForeground(QColor("#FF79C6"))  # розово-фиолетовый
-        create_fmt.setFontWeight(QFont.Weight.Bold)
-
-        list_fmt = QTextCharFormat()
-        list_fmt.setForeground(QColor("#8BE9FD"))  # голубой
-        list_fmt.setFontWeight(QFont.Weight.Bold)
-
-        style_fmt = QTextCharFormat()
-        style_fmt.setForeground(QColor("#50FA7B"))  # салатовый
-        style_fmt.setFontWeight(QFont.Weight.Bold)
-
-        keyword_fmt = QTextCharFormat()
-        keyword_fmt.setForeground(QColor("#BD93F9"))  # сиреневый
-
-        number_fmt = QTextCharFormat()
-        number_fmt.setForeground(QColor("#F1FA8C"))  # жёлтый
-
-        color_fmt = QTextCharFormat()
-        color_fmt.setForeground(QColor("#FFB86C"))  # оранжевый
-
-        param_fmt = QTextCharFormat()
-        param_fmt.setForeground(QColor("#8BE9FD"))  # голубой
-
-        braces_fmt = QTextCharFormat()
-        braces_fmt.setForeground(QColor("#6272A4"))  # серый скобки
-
-        # === Правила ===
-        self.rules += [
-            # Ключевые слова языка
-            (QRegularExpression(r"\bCreate\b"), create_fmt),
-            (QRegularExpression(r"\bList\b"), list_fmt),
-            (QRegularExpression(r"\bStyle\b"), style_fmt),
-            (QRegularExpression(r"\b(Square|Circle|Join|Package)\b"), keyword_fmt),
-
-            # Параметры (x:, y:, width:, height:, color:)
-            (QRegularExpression(r"\b[a-zA-Z_]+\s*:"), param_fmt),
-
-            # Цвета #FFFFFF / #FF5733
-            (QRegularExpression(r"#(?:[0-9A-Fa-f]{3,6})\b"), color_fmt),
-
-            # Числа
-            (QRegularExpression(r"\b\d+(\.\d+)?\b"), number_fmt),
-
-            # Фигурные скобки
-            (QRegularExpression(r"[{}()]"), braces_fmt)
-        ]
+        self.formats = {
+            "create": _format("#FF79C6", bold=True),    # розово-фиолетовый
+            "list": _format("#8BE9FD", bold=True),      # голубой
+            "style": _format("#50FA7B", bold=True),     # салатовый
+            "keyword": _format("#BD93F9"),              # сиреневый: Square, Circle, Join, Package
+            "number": _format("#F1FA8C"),               # жёлтый
+            "color": _format("#FFB86C"),                # оранжевый: #FFFFFF / #FF5733
+            "param": _format("#8BE9FD"),                # голубой: x:, y:, width:, color:
+            "braces": _format("#6272A4"),               # серый: скобки
+        }
+        self.formats["hash"] = self.formats["color"]
+        self.formats["swatch"] = self.formats["param"]
 
     def highlightBlock(self, text):
-        for pattern, fmt in self.rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+        self.highlight_text(text, self.previousBlockState(), self.setFormat)
+
+    def highlight_text(self, text: str, previous_state: int, set_format) -> int:
+        """Подсвечивает строку text вызовами set_format(начало, длина, формат) в позициях UTF-16.
+
+        Возвращает состояние блока; у SLC многострочных конструкций нет — всегда -1.
+        Повторяющиеся строки (`}`, `Style { ... }`) берутся из общего SPAN_CACHE.
+        """
+        formats = self.formats
+        entry = SPAN_CACHE.get("slc", text, previous_state)
+        if entry is None:
+            spans = self._spans(text)
+            SPAN_CACHE.put("slc", text, previous_state, spans, -1)
+        else:
+            spans = entry[0]
+        for start, length, name in spans:
+            set_format(start, length, formats[name])
+        return -1
+
+    @staticmethod
+    def _spans(text: str):
+        """[(начало, длина, имя формата)] в позициях UTF-16"""
+        spans = []
+        if text.isascii() or not _ASTRAL_RE.search(text):
+            for match in _TOKEN_RE.finditer(text):
+                start, end = match.span()
+                group = match.lastgroup
+                if group == "swatch":
+                    split = match.end("swatch_color")
+                    spans.append((start, split - start, "color"))
+                    start = split
+                spans.append((start, end - start, group))
+            return spans
+        # позиции str → позиции UTF-16 в блоке
+        astral = [m.start() for m in _ASTRAL_RE.finditer(text)]
+        for match in _TOKEN_RE.finditer(text):
+            start, end = match.span()
+            group = match.lastgroup
+            if group == "swatch":
+                split = match.end("swatch_color")
+                split16 = split + sum(1 for a in astral if a < split)
+                start16 = start + sum(1 for a in astral if a < start)
+                spans.append((start16, split16 - start16, "color"))
+                start = split
+            start16 = start + sum(1 for a in astral if a < start)
+            end16 = end + sum(1 for a in astral if a < end)
+            spans.append((start16, end16 - start16, group))
+        return spans
@@ -0,0 +1,183 @@
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtGui import QTextLayout
+
+from src.highlighters.span_cache import SPAN_CACHE
+
+# === Ленивая подсветка больших документов ===
+# QSyntaxHighlighter, подключённый к непустому документу, сразу проходит его целиком:
+# на 200 тыс. строк это секунды, даже если highlightBlock ничего не делает. Здесь
+# подсветкой управляем сами: видимые блоки красятся сразу, остальные — по порядку
+# сверху вниз порциями по _SLICE секунд, когда цикл событий свободен. Форматы кладутся
+# в QTextLayout блока так же, как это делает QSyntaxHighlighter; перераскладываются
+# (markContentsDirty) только блоки, которые уже раскладывались — остальные возьмут
+# форматы, когда впервые попадут на экран, и проход не перерисовывает редактор зря.
+LAZY_MIN_BLOCKS = 5000          # документы короче подсвечиваются обычным QSyntaxHighlighter
+_SLICE = 0.008
+_CHECK_EVERY = 32               # блоков между проверками времени
+
+
+class LazyHighlighter(QObject):
+    """Подсветка документа editor (QPlainTextEdit) форматами highlighter.highlight_text.
+
+    Блоки с номером меньше swept подсвечены верно; блоки от swept до frontier были
+    верны для прежнего текста выше них; дальше frontier ещё не подсвечивалось ничего.
+    После правки перекрашиваются изменённые блоки и следующие за ними, пока состояние
+    блока не сойдётся с прежним — как у QSyntaxHighlighter, но тоже порциями.
+    """
+
+    def __init__(self, editor, highlighter):
+        super().__init__(editor)
+        self.editor = editor
+        self.doc = editor.document()
+        self.highlighter = highlighter
+        self.blocks = self.doc.blockCount()
+        self.swept = 0
+        self.frontier = 0
+        self.must = 0                   # блоки до must перекрашиваются, даже если состояние сошлось
+        self._view = None               # (первый видимый блок, высота) при прошлой подсветке экрана
+        self._started = time.perf_counter()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._tick)
+        self.doc.contentsChange.connect(self._on_contents_change)
+        editor.updateRequest.connect(self._on_update_request)
+
+        self.highlight_visible()
+        self.timer.start()
+
+    @property
+    def done(self) -> bool:
+        return self.swept >= self.doc.blockCount()
+
+    def cancel(self, clear_formats: bool = True):
+        """Останавливает подсветку; clear_formats — ещё и убрать уже наложенные форматы"""
+        self.timer.stop()
+        self.doc.contentsChange.disconnect(self._on_contents_change)
+        self.editor.updateRequest.disconnect(self._on_update_request)
+        if clear_formats:
+            block = self.doc.begin()
+            while block.isValid():
+                block.layout().clearFormats()
+                block = block.next()
+            self.doc.markContentsDirty(0, self.doc.characterCount())
+        self.deleteLater()
+
+    # === Видимые блоки ===
+    def highlight_visible(self):
+        """Сразу красит видимые блоки, до которых ещё не дошёл проход по порядку.
+
+        Их состояние не запоминается: начальное состояние может оказаться неточным
+        (строка в тройных кавычках выше экрана), верное даст проход сверху.
+        """
+        editor = self.editor
+        block = editor.firstVisibleBlock()
+        self._view = (block.blockNumber(), editor.viewport().height())
+        if not block.isValid():
+            return
+        previous = block.previous()
+        state = previous.userState() if previous.isValid() and previous.blockNumber() < self.frontier else -1
+        offset = editor.contentOffset()
+        bottom = editor.viewport().height()
+        first = last = None
+        while block.isValid() and editor.blockBoundingGeometry(block).translated(offset).top() <= bottom:
+            if block.blockNumber() >= self.swept:
+                state = self._format_block(block, state)
+                if first is None:
+                    first = block
+                last = block
+            else:
+                state = block.userState()
+            block = block.next()
+        if first is not None:
+            self.doc.markContentsDirty(first.position(), last.position() + last.length() - first.position())
+            # проход не должен перескочить их, даже если состояние выше сойдётся
+            self.must = max(self.must, last.blockNumber() + 1)
+
+    def _on_update_request(self, rect, dy):
+        if self.done:
+            return
+        if self._view != (self.editor.firstVisibleBlock().blockNumber(), self.editor.viewport().height()):
+            self.highlight_visible()
+
+    # === Проход по порядку ===
+    def _tick(self):
+        if self._sweep(_SLICE):
+            self.timer.stop()
+            if self._started is not None:
+                print(f"🎨 Подсветка готова: {self.doc.blockCount()} строк за "
+                      f"{time.perf_counter() - self._started:.1f} с ({SPAN_CACHE.summary()})")
+                self._started = None
+
+    def _sweep(self, budget: float) -> bool:
+        """Подсвечивает блоки с swept, пока не кончится budget секунд; True — всё подсвечено"""
+        deadline = time.perf_counter() + budget
+        doc = self.doc
+        count = doc.blockCount()
+        n = 0
+        while self.swept < count:
+            block = doc.findBlockByNumber(self.swept)
+            previous = block.previous()
+            state = previous.userState() if previous.isValid() else -1
+            first = last = None         # блоки, уже разложенные в строки: их надо перерисовать
+            while True:
+                new_state = self._format_block(block, state)
+                changed = new_state != block.userState()
+                block.setUserState(new_state)
+                if block.layout().lineCount():
+                    if first is None:
+                        first = block
+                    last = block
+                self.swept += 1
+                n += 1
+                if self.swept >= self.frontier:
+                    self.frontier = self.swept
+                elif not changed and self.swept >= self.must:
+                    # дальше текст и начальные состояния прежние — до frontier всё верно
+                    self.swept = self.frontier
+                    break
+                if self.swept >= count or (n % _CHECK_EVERY == 0 and time.perf_counter() > deadline):
+                    break
+                block = block.next()
+                state = new_state
+            if first is not None:
+                doc.markContentsDirty(first.position(), last.position() + last.length() - first.position())
+            if time.perf_counter() > deadline:
+                break
+        return self.swept >= count
+
+    def _format_block(self, block, state: int) -> int:
+        ranges = []
+
+        def set_format(start, length, fmt):
+            fr = QTextLayout.FormatRange()
+            fr.start, fr.length, fr.format = start, length, fmt
+            ranges.append(fr)
+
+        state = self.highlighter.highlight_text(block.text(), state, set_format)
+        block.layout().setFormats(ranges)
+        return state
+
+    # === Правки ===
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        doc = self.doc
+        first = doc.findBlock(position)
+        last = doc.findBlock(position + added)
+        if not last.isValid():
+            last = doc.lastBlock()
+        a, b = first.blockNumber(), last.blockNumber()
+        delta = doc.blockCount() - self.blocks
+        self.blocks = doc.blockCount()
+
+        def shift(number):
+            # номер блока до правки → после: блоки ниже изменённых сдвигаются на delta
+            return number if number <= a else max(a, number + delta)
+
+        self.swept = min(shift(self.swept), a)
+        self.frontier = shift(self.frontier)
+        self.must = max(shift(self.must), b + 1)
+        if not self._sweep(_SLICE):
+            self.highlight_visible()
+            self.timer.start()
@@ -1,41 +1,128 @@
+import re
+
 from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
-from PyQt6.QtCore import QRegularExpression
+
+from src.highlighters.span_cache import SPAN_CACHE
+
+KEYWORDS = [
+    "def", "class", "import", "from", "as", "if", "elif", "else",
+    "for", "while", "try", "except", "finally", "return", "with",
+    "lambda", "yield", "True", "False", "None", "and", "or", "not", "in"
+]
+
+# === Токены Python ===
+# Одна регулярка-альтернатива, блок проходится один раз. Строка находится по открывающей
+# кавычке, её конец ищется отдельно (_STRING_BODY): так строки и комментарии не
+# перекрывают друг друга, как при «".*"» и «#.*», пущенных независимо.
+_TOKEN_RE = re.compile(
+    r"(?P<comment>#.*)"
+    r"|(?P<string>(?<!\w)(?:[rRbBfFuU]|[rR][bBfF]|[bBfF][rR])?(?P<quote>'''|\"\"\"|'|\"))"
+    r"|(?P<keyword>\b(?:" + "|".join(KEYWORDS) + r")\b)"
+    r"|(?P<function>\b[^\W\d]\w*(?=\())"
+)
+
+# === Состояние блока (setCurrentBlockState) ===
+# В каком литерале строки закончился блок: тройные кавычки, или одинарные, продолженные
+# обратной косой чертой в конце строки. 0 — ни в каком. Не -1, как у нового блока: иначе
+# после вставки нескольких строк Qt не заметит, что состояние изменилось, и не пойдёт дальше.
+_NORMAL = 0
+_QUOTES = ["'''", '"""', "'", '"']
+_STATES = {quote: state for state, quote in enumerate(_QUOTES, 1)}
+
+# Тело строки до закрывающей кавычки; \\. — экранирование (и в r-строках кавычку не закрывает)
+_STRING_BODY = {
+    "'''": re.compile(r"(?:[^'\\]|\\.|'(?!''))*"),
+    '"""': re.compile(r'(?:[^"\\]|\\.|"(?!""))*'),
+    "'": re.compile(r"(?:[^'\\]|\\.)*"),
+    '"': re.compile(r'(?:[^"\\]|\\.)*'),
+}
+
+# символы вне BMP: в документе Qt (UTF-16) они занимают две позиции
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def _format(color: str, bold: bool = False, italic: bool = False) -> QTextCharFormat:
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color))
+    if bold:
+        fmt.setFontWeight(QFont.Weight.Bold)
+    if italic:
+        fmt.setFontItalic(True)
+    return fmt
+
 
 class PythonHighlighter(QSyntaxHighlighter):
+    """Подсветка Python за один проход по блоку.
+
+    Многострочные строки продолжаются через состояние блока: после правки строки Qt
+    перекрашивает следующие блоки, только пока их начальное состояние меняется.
+    """
+
     def __init__(self, document):
         super().__init__(document)
-        self.rules = []
+        self.formats = {
+            "keyword": _format("#ff79c6", bold=True),
+            "string": _format("#f1fa8c"),
+            "comment": _format("#6272a4", italic=True),
+            "function": _format("#50fa7b"),
+        }
+
+    def highlightBlock(self, text):
+        self.setCurrentBlockState(self.highlight_text(text, self.previousBlockState(), self.setFormat))
 
-        keyword_fmt = QTextCharFormat()
-        keyword_fmt.setForeground(QColor("#ff79c6"))
-        keyword_fmt.setFontWeight(QFont.Weight.Bold)
+    def highlight_text(self, text: str, previous_state: int, set_format) -> int:
+        """Подсвечивает строку text вызовами set_format(начало, длина, формат) в позициях UTF-16.
 
-        string_fmt = QTextCharFormat()
-        string_fmt.setForeground(QColor("#f1fa8c"))
+        previous_state — состояние предыдущего блока (-1 у первого); возвращает состояние этого.
+        """
+        entry = SPAN_CACHE.get("python", text, previous_state)
+        if entry is None:
+            entry = self._spans(text, previous_state)
+            SPAN_CACHE.put("python", text, previous_state, *entry)
+        formats = self.formats
+        for start, length, name in entry[0]:
+            set_format(start, length, formats[name])
+        return entry[1]
 
-        comment_fmt = QTextCharFormat()
-        comment_fmt.setForeground(QColor("#6272a4"))
-        comment_fmt.setFontItalic(True)
+    def _spans(self, text: str, previous_state: int):
+        """([(начало, длина, имя формата)] в позициях UTF-16, состояние блока)"""
+        spans = []          # (начало, длина, имя формата) в позициях str
+        state = _NORMAL
+        pos = 0
 
-        function_fmt = QTextCharFormat()
-        function_fmt.setForeground(QColor("#50fa7b"))
+        if previous_state > _NORMAL:
+            pos, state = self._string_end(text, 0, _QUOTES[previous_state - 1])
+            spans.append((0, pos, "string"))
 
-        keywords = [
-            "def", "class", "import", "from", "as", "if", "elif", "else",
-            "for", "while", "try", "except", "finally", "return", "with",
-            "lambda", "yield", "True", "False", "None", "and", "or", "not", "in"
-        ]
+        while state == _NORMAL:
+            match = _TOKEN_RE.search(text, pos)
+            if match is None:
+                break
+            group = match.lastgroup
+            start = match.start()
+            if group == "string":
+                pos, state = self._string_end(text, match.end(), match.group("quote"))
+            else:
+                pos = match.end()
+            spans.append((start, pos - start, group))
 
-        self.rules += [(QRegularExpression(rf"\b{kw}\b"), keyword_fmt) for kw in keywords]
-        self.rules += [
-            (QRegularExpression(r"#.*"), comment_fmt),
-            (QRegularExpression(r"\".*\"|'.*'"), string_fmt),
-            (QRegularExpression(r"\b[A-Za-z_][A-Za-z0-9_]*(?=\()"), function_fmt),
-        ]
+        if not text.isascii() and _ASTRAL_RE.search(text):
+            # позиции str → позиции UTF-16 в блоке
+            astral = [m.start() for m in _ASTRAL_RE.finditer(text)]
 
-    def highlightBlock(self, text):
-        for pattern, fmt in self.rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+            def utf16(i):
+                return i + sum(1 for a in astral if a < i)
+
+            spans = [(utf16(start), utf16(start + length) - utf16(start), name) for start, length, name in spans]
+        return spans, state
+
+    @staticmethod
+    def _string_end(text: str, pos: int, quote: str):
+        """(конец строки в блоке, состояние блока) для литерала с кавычкой quote, тело с pos"""
+        end = _STRING_BODY[quote].match(text, pos).end()
+        if text.startswith(quote, end):
+            return end + len(quote), _NORMAL
+        if len(quote) == 3 or end < len(text):
+            # тройные кавычки идут дальше; одинарные — только после «\» в конце строки
+            return len(text), _STATES[quote]
+        return len(text), _NORMAL   # незакрытая строка обрывается концом строки
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+DEFAULT_MAX_LINES = 20_000
+MAX_LINE_LENGTH = 256           # длинные строки почти не повторяются — их не кэшируем
+
+
+class SpanCache:
+    """LRU-кэш подсветки строк, общий для всех открытых документов.
+
+    Ключ — (вид подсветки, текст строки, состояние предыдущего блока); значение —
+    (список (начало, длина, имя формата) в позициях UTF-16, состояние блока). Имена
+    форматов, а не сами QTextCharFormat: у каждого документа свой экземпляр подсветки.
+    hits / misses считают обращения, чтобы видеть, окупается ли кэш на проекте.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES):
+        self.max_lines = max_lines
+        self.hits = 0
+        self.misses = 0
+        self._lines = OrderedDict()
+
+    def __len__(self):
+        return len(self._lines)
+
+    def get(self, kind: str, text: str, state: int):
+        """(spans, состояние) или None"""
+        key = (kind, text, state)
+        entry = self._lines.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._lines.move_to_end(key)
+        return entry
+
+    def put(self, kind: str, text: str, state: int, spans, end_state: int):
+        if len(text) > MAX_LINE_LENGTH:
+            return
+        self._lines[(kind, text, state)] = (spans, end_state)
+        if len(self._lines) > self.max_lines:
+            self._lines.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        return f"кэш строк: {len(self)}, попаданий {self.hit_rate:.0%} ({self.hits} из {self.hits + self.misses})"
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+    def clear(self):
+        self._lines.clear()
+        self.reset_stats()
+
+
+# один кэш на все документы: одинаковые строки в разных файлах считаются один раз
+SPAN_CACHE = SpanCache()
@@ -0,0 +1,105 @@
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+
+# === Большие файлы ===
+# setPlainText большого файла — одна длинная операция в потоке GUI: на 100 МБ IDE
+# замирает на секунды. Файлы от LARGE_FILE_BYTES читаются и декодируются в пуле
+# потоков (read_chunks), а в документ добавляются кусками по целым строкам, не дольше
+# _SLICE секунд за раз: окно отвечает, прогресс виден. Подсветка и проверка
+# включаются, когда загружен весь текст.
+LARGE_FILE_BYTES = 8 * 1024 * 1024
+LOAD_CHUNK_CHARS = 1 << 17      # ~20 мс на вставку куска в QPlainTextEdit
+_SLICE = 0.016
+
+
+def read_chunks(path: str, chunk_chars: int = LOAD_CHUNK_CHARS):
+    """(куски текста файла, число строк); каждый кусок кончается переводом строки, кроме последнего.
+
+    Читается как open(path, encoding="utf-8").read(): тот же текст и те же переводы строк.
+    """
+    chunks = []
+    lines = 1
+    tail = ""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            piece = f.read(chunk_chars)
+            if not piece:
+                break
+            piece = tail + piece
+            cut = piece.rfind("\n") + 1
+            if cut:
+                chunks.append(piece[:cut])
+                lines += chunks[-1].count("\n")
+            tail = piece[cut:]
+    if tail:
+        chunks.append(tail)
+    return chunks, lines
+
+
+class ChunkedLoader(QObject):
+    """Добавляет куски chunks в конец документа editor, пока цикл событий свободен.
+
+    Пока идёт загрузка, редактор только для чтения и без истории правок (undo),
+    его сигналы на время вставки блокируются — как при setPlainText в open_file_in_editor.
+    progress(процент) после каждой порции, finished() — когда вставлен весь текст.
+    """
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    def __init__(self, editor, chunks, lines: int = 0):
+        super().__init__(editor)
+        self.editor = editor
+        self.chunks = chunks
+        self.total = sum(len(chunk) for chunk in chunks) or 1
+        self.loaded = 0
+        self._next = 0
+        self._cursor = QTextCursor(editor.document())
+
+        editor.setReadOnly(True)
+        editor.setUndoRedoEnabled(False)
+        editor.reserve_line_numbers(lines)
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._tick)
+        self.timer.start()
+
+    @property
+    def done(self) -> bool:
+        return self._next >= len(self.chunks)
+
+    def cancel(self):
+        """Останавливает загрузку; уже вставленный текст остаётся"""
+        self.timer.stop()
+        self._restore_editor()
+        self.deleteLater()
+
+    def _tick(self):
+        deadline = time.perf_counter() + _SLICE
+        editor = self.editor
+        editor.blockSignals(True)
+        try:
+            while not self.done:
+                chunk = self.chunks[self._next]
+                self.chunks[self._next] = None          # вставленный кусок больше не нужен
+                self._cursor.movePosition(QTextCursor.MoveOperation.End)
+                self._cursor.insertText(chunk)
+                self._next += 1
+                self.loaded += len(chunk)
+                if time.perf_counter() > deadline:
+                    break
+        finally:
+            editor.blockSignals(False)
+        self.progress.emit(self.loaded * 100 // self.total)
+        if self.done:
+            self.timer.stop()
+            self._restore_editor()
+            self.finished.emit()
+
+    def _restore_editor(self):
+        # сигналы редактора при вставке блокировались — ширина нумерации по итоговому числу строк
+        self.editor.reserve_line_numbers(0)
+        self.editor.setUndoRedoEnabled(True)
+        self.editor.setReadOnly(False)
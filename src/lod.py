@@ -0,0 +1,212 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:     # без numpy все сцены рисуются точно (GridIndex + DisplayList)
+    np = None
+
+# === Уровень детализации (LOD) ===
+# В плитке векторно рисуются только фигуры, заметные на экране: не меньше LOD_PIXELS
+# и не больше LOD_EXACT_BUDGET самых крупных. Остальные «размазываются» (splat) в
+# растр с z-буфером: в каждой клетке — цвет самой верхней фигуры, как при точной
+# отрисовке. Клетка растра подбирается так, чтобы мелкая фигура занимала 1–3 клетки.
+LOD_MIN_SHAPES = 50_000         # сцены меньше рисуются только точно
+LOD_PIXELS = 2
+LOD_EXACT_BUDGET = 4096
+_MAX_SPAN = 3
+
+_POINT_SHAPES_PER_CELL = 16
+_POINT_MAX_CELLS = 64
+_POINT_MIN_CELL = 32
+
+
+def available() -> bool:
+    return np is not None
+
+
+def int_column(column) -> array:
+    """Столбец координат сцены → array("q") с отбрасыванием дробной части, как int()"""
+    if np is None:
+        return array("q", map(int, column))
+    out = array("q")
+    out.frombytes(np.frombuffer(column, np.float64).astype(np.int64).tobytes())
+    return out
+
+
+class LodScene:
+    """Векторизованное (numpy) представление сцены для плиток с уровнем детализации.
+
+    drawable — рисуется ли фигура каждого id типа; colors — цвет «точки» для каждого
+    id цвета (0xAARRGGBB, уже наложенный на фон background).
+    """
+
+    def __init__(self, scene, drawable, colors, background: int):
+        x = np.trunc(np.frombuffer(scene.x, np.float64))
+        y = np.trunc(np.frombuffer(scene.y, np.float64))
+        w = np.frombuffer(scene.width, np.int32).astype(np.float64)
+        h = np.frombuffer(scene.height, np.int32).astype(np.float64)
+        # как рисует Qt: [x, x + w) или [x + w, x) при отрицательной ширине
+        self.left = x + np.minimum(w, 0)
+        self.right = x + np.maximum(w, 0)
+        self.top = y + np.minimum(h, 0)
+        self.bottom = y + np.maximum(h, 0)
+        self.size = np.maximum(np.abs(w), np.abs(h))
+        kind = np.frombuffer(scene.kind, np.uint32)
+        self.visible = np.asarray(drawable, bool)[kind] & (w != 0) & (h != 0)
+        self.colors = np.asarray(colors, np.uint32)[np.frombuffer(scene.color, np.uint32)]
+        self.background = np.uint32(background)
+        self._scaled_cache = (None, None, None)
+        self._point_grid = None         # см. build_point_grid: строится отдельно, в фоне
+
+    # === Поиск фигур под точкой ===
+    # Та же равномерная сетка, что в GridIndex, но собранная numpy: пары (клетка, фигура)
+    # отсортированы по клетке, и фигуры клетки находятся двоичным поиском (searchsorted).
+    # Фигуры крупнее _POINT_MAX_CELLS клеток проверяются всегда, как GridIndex.large.
+    def build_point_grid(self):
+        shapes = np.flatnonzero(self.visible)
+        if len(shapes):
+            l, t, r, b = self.left[shapes], self.top[shapes], self.right[shapes], self.bottom[shapes]
+            area = (r.max() - l.min()) * (b.max() - t.min())
+            cell = max(_POINT_MIN_CELL, float(np.sqrt(area * _POINT_SHAPES_PER_CELL / len(shapes))),
+                       float(np.mean(self.size[shapes])))
+        else:
+            l = t = r = b = np.zeros(0)
+            cell = _POINT_MIN_CELL
+        c0, c1 = np.floor(l / cell).astype(np.int64), np.floor(r / cell).astype(np.int64)
+        r0, r1 = np.floor(t / cell).astype(np.int64), np.floor(b / cell).astype(np.int64)
+        cols = c1 - c0 + 1
+        spans = cols * (r1 - r0 + 1)
+        large = spans > _POINT_MAX_CELLS
+        large_shapes = shapes[large]
+
+        keep = ~large
+        shapes, c0, r0, cols, spans = shapes[keep], c0[keep], r0[keep], cols[keep], spans[keep]
+        owner = np.repeat(np.arange(len(shapes)), spans)
+        offset = np.arange(len(owner)) - np.repeat(np.cumsum(spans) - spans, spans)
+        keys = _cell_key(c0[owner] + offset % cols[owner], r0[owner] + offset // cols[owner])
+        order = np.argsort(keys, kind="stable")     # внутри клетки — по возрастанию индекса
+        # одним присваиванием: at() может читать из другого потока
+        self._point_grid = (cell, keys[order], shapes[owner[order]], large_shapes)
+
+    @property
+    def has_point_grid(self) -> bool:
+        return self._point_grid is not None
+
+    def at(self, x: float, y: float):
+        """Индексы видимых фигур, чьи габариты [left, right) × [top, bottom) содержат точку, по возрастанию.
+
+        Пока build_point_grid() не закончен — пустой список.
+        """
+        if self._point_grid is None:
+            return []
+        cell, keys, shapes, large = self._point_grid
+        key = _cell_key(np.int64(x // cell), np.int64(y // cell))
+        lo, hi = np.searchsorted(keys, [key, key + 1])
+        candidates = shapes[lo:hi]
+        if len(large):
+            candidates = np.union1d(candidates, large)
+        hit = (self.left[candidates] <= x) & (self.right[candidates] > x) \
+            & (self.top[candidates] <= y) & (self.bottom[candidates] > y)
+        return candidates[hit].tolist()
+
+    def _grid_query(self, x0: float, y0: float, x1: float, y1: float):
+        """Видимые фигуры из клеток сетки, задевающих [x0, x1] × [y0, y1], по возрастанию индекса.
+
+        Это кандидаты: точную проверку габаритов делает вызывающий. None — сетка ещё не
+        построена или прямоугольник накрывает больше клеток, чем в сетке записей:
+        тогда быстрее проверить все фигуры.
+        """
+        grid = self._point_grid
+        if grid is None:
+            return None
+        cell, keys, shapes, large = grid
+        # клетка про запас с каждой стороны: округление при пересчёте из масштаба
+        c0, c1 = int(x0 // cell) - 1, int(x1 // cell) + 1
+        r0, r1 = int(y0 // cell) - 1, int(y1 // cell) + 1
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > len(keys):
+            return None
+        rows = np.arange(r0, r1 + 1, dtype=np.int64)
+        starts, ends = [], []
+        # в строке сетки клетки с колонками одного знака идут в keys подряд (см. _cell_key)
+        for lo, hi in ((c0, min(c1, -1)), (max(c0, 0), c1)):
+            if lo <= hi:
+                starts.append(np.searchsorted(keys, _cell_key(np.int64(lo), rows)))
+                ends.append(np.searchsorted(keys, _cell_key(np.int64(hi), rows) + 1))
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        counts = ends - starts
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        found = shapes[np.repeat(starts, counts) + offsets]
+        return np.unique(np.concatenate((found, large)))
+
+    def _scaled(self, zoom: float):
+        """Габариты в пикселях масштаба zoom (кэшируются для последнего масштаба).
+
+        Кэш заменяется одним присваиванием: плитки рисуются из нескольких потоков.
+        """
+        cached_zoom, box, size = self._scaled_cache
+        if cached_zoom != zoom:
+            box = (self.left * zoom, self.top * zoom, self.right * zoom, self.bottom * zoom)
+            size = self.size * zoom
+            self._scaled_cache = (zoom, box, size)
+        return box, size
+
+    def tile(self, zoom: float, left: int, top: int, size: int):
+        """Плитка [left, left + size) × [top, top + size) в пикселях масштаба zoom.
+
+        Возвращает (растр uint32 size × size, индексы фигур для точной отрисовки поверх).
+        """
+        (l, t, r, b), scaled = self._scaled(zoom)
+        right, bottom = left + size, top + size
+        # кандидаты — из сетки build_point_grid; пока её нет, проверяются все фигуры
+        idx = self._grid_query(left / zoom, top / zoom, right / zoom, bottom / zoom)
+        if idx is None:
+            idx = np.flatnonzero(self.visible & (l < right) & (r > left) & (t < bottom) & (b > top))
+        else:
+            idx = idx[(l[idx] < right) & (r[idx] > left) & (t[idx] < bottom) & (b[idx] > top)]
+        sizes = scaled[idx]
+
+        if len(idx) > LOD_EXACT_BUDGET:
+            cut = np.partition(sizes, len(sizes) - LOD_EXACT_BUDGET)[len(sizes) - LOD_EXACT_BUDGET]
+            exact = sizes > max(cut, LOD_PIXELS - 1e-9)
+        else:
+            exact = sizes >= LOD_PIXELS
+        raster = np.full((size, size), self.background, np.uint32)
+        splat = np.flatnonzero(~exact)
+        if len(splat):
+            self._splat(raster, idx[splat], sizes[splat].max(), l, t, r, b, left, top)
+        return raster, idx[exact]
+
+    def _splat(self, raster, shapes, largest: float, l, t, r, b, left: int, top: int):
+        size = raster.shape[0]
+        cell = max(1, int(np.ceil(largest / (_MAX_SPAN - 1))))
+        cells = -(-size // cell)
+        c0 = np.floor((l[shapes] - left) / cell).astype(np.int64)
+        r0 = np.floor((t[shapes] - top) / cell).astype(np.int64)
+        c1 = np.maximum(c0, np.ceil((r[shapes] - left) / cell).astype(np.int64) - 1)
+        r1 = np.maximum(r0, np.ceil((b[shapes] - top) / cell).astype(np.int64) - 1)
+        np.clip(c0, 0, cells - 1, out=c0)
+        np.clip(r0, 0, cells - 1, out=r0)
+        np.clip(c1, 0, cells - 1, out=c1)
+        np.clip(r1, 0, cells - 1, out=r1)
+
+        # z-буфер: в клетке остаётся фигура с наибольшим индексом — нарисованная последней
+        zbuf = np.full(cells * cells, -1, np.int64)
+        for dy in range(_MAX_SPAN):
+            for dx in range(_MAX_SPAN):
+                col, row = c0 + dx, r0 + dy
+                hit = (col <= c1) & (row <= r1)
+                if hit.any():
+                    np.maximum.at(zbuf, row[hit] * cells + col[hit], shapes[hit])
+
+        covered = zbuf >= 0
+        flat = np.full(cells * cells, self.background, np.uint32)
+        flat[covered] = self.colors[zbuf[covered]]
+        grid = flat.reshape(cells, cells)
+        if cell > 1:
+            grid = grid.repeat(cell, axis=0).repeat(cell, axis=1)
+        raster[:] = grid[:size, :size]
+
+
+def _cell_key(col, row):
+    # клетка → одно число int64 (колонка и строка помещаются в 32 бита каждая)
+    return (row << 32) + (col & 0xffffffff)
@@ -0,0 +1,143 @@
+import mmap
+from array import array
+
+from PyQt6.QtWidgets import QAbstractScrollArea
+from PyQt6.QtGui import QPainter, QColor, QFont, QFontMetrics
+from PyQt6.QtCore import Qt
+
+from src.workers import Job
+
+try:
+    import numpy as np
+except ImportError:     # без numpy начала строк ищутся циклом mmap.find
+    np = None
+
+# === Просмотр файла через mmap ===
+# Для файлов, которые не нужно править: текст не загружается в QTextDocument вовсе.
+# Файл отображается в память, в пуле потоков строится индекс начал строк, а
+# paintEvent декодирует только видимые строки — ОС подкачивает нужные страницы сама.
+MAX_LINE_BYTES = 4096           # длиннее строки обрезаются при показе
+TAB_WIDTH = 4
+
+
+def index_lines(data) -> array:
+    """Смещения начал строк в data (bytes или mmap); первое — 0"""
+    if np is not None and len(data):
+        ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 10)
+        starts = array("q", [0])
+        starts.frombytes((ends + 1).astype(np.int64).tobytes())
+    else:
+        starts = array("q", [0])
+        find = data.find
+        pos = find(b"\n")
+        while pos >= 0:
+            starts.append(pos + 1)
+            pos = find(b"\n", pos + 1)
+    if len(starts) > 1 and starts[-1] == len(data):
+        starts.pop()            # перевод строки в конце файла не начинает новую строку
+    return starts
+
+
+class MappedFileView(QAbstractScrollArea):
+    """Просмотр файла path только для чтения; строки читаются из mmap по мере прокрутки"""
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.setFont(QFont("Consolas", 12))
+        self.setStyleSheet("background-color:#282a36;color:#f8f8f2;border:none;")
+        self.metrics = QFontMetrics(self.font())
+        self._max_width = 0             # ширина самой длинной из показанных строк
+        self.starts = None              # индекс строк, пока строится — None
+
+        with open(path, "rb") as f:
+            # пустой файл отобразить нельзя — показываем пустой bytes
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.seek(0, 2) else b""
+        self._job = Job(path, index_lines, self.data)
+        self._job.signals.done.connect(self._indexed)
+        self._job.start()
+
+    def close_file(self):
+        """Отпускает отображение файла (при закрытии панели)"""
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
+        self.starts = None
+        if isinstance(self.data, mmap.mmap):
+            try:
+                self.data.close()
+            except BufferError:
+                pass            # индекс ещё строится по буферу — закроется сборщиком мусора
+        self.data = b""
+
+    @property
+    def line_count(self) -> int:
+        return len(self.starts) if self.starts is not None else 0
+
+    def line(self, i: int) -> str:
+        start = self.starts[i]
+        end = self.starts[i + 1] - 1 if i + 1 < len(self.starts) else len(self.data)
+        raw = self.data[start:min(end, start + MAX_LINE_BYTES)]
+        return raw.rstrip(b"\r\n").decode("utf-8", "replace").expandtabs(TAB_WIDTH)
+
+    def _indexed(self, _, starts):
+        if self._job is None:
+            return              # файл уже закрыт
+        self.starts = starts
+        self._update_scrollbars()
+        self.viewport().update()
+
+    # ======= Геометрия =======
+    def gutter_width(self) -> int:
+        return 10 + self.metrics.horizontalAdvance("9") * len(str(max(1, self.line_count)))
+
+    def visible_rows(self) -> int:
+        return max(1, self.viewport().height() // self.metrics.height())
+
+    def _update_scrollbars(self):
+        rows = self.visible_rows()
+        v = self.verticalScrollBar()
+        v.setRange(0, max(0, self.line_count - rows))
+        v.setPageStep(rows)
+        h = self.horizontalScrollBar()
+        h.setRange(0, max(0, self._max_width - self.viewport().width() + self.gutter_width()))
+        h.setPageStep(self.viewport().width())
+        h.setSingleStep(self.metrics.horizontalAdvance(" ") * 4)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    # ======= Отрисовка =======
+    def paintEvent(self, event):
+        p = QPainter(self.viewport())
+        p.setFont(self.font())
+        rect = self.viewport().rect()
+        if self.starts is None:
+            p.setPen(QColor("#888"))
+            p.drawText(rect, Qt.AlignmentFlag.AlignCenter, "⏳ Индексирование строк…")
+            return
+        gutter = self.gutter_width()
+        h = self.metrics.height()
+        ascent = self.metrics.ascent()
+        x = gutter + 4 - self.horizontalScrollBar().value()
+        first = self.verticalScrollBar().value()
+        last = min(self.line_count, first + self.visible_rows() + 1)
+        widest = self._max_width
+
+        p.setClipRect(gutter, 0, rect.width() - gutter, rect.height())
+        p.setPen(QColor("#f8f8f2"))
+        for row, i in enumerate(range(first, last)):
+            text = self.line(i)
+            widest = max(widest, self.metrics.horizontalAdvance(text))
+            p.drawText(x, row * h + ascent, text)
+
+        p.setClipping(False)
+        p.fillRect(0, 0, gutter, rect.height(), QColor("#2c2c34"))
+        p.setPen(QColor("#888"))
+        for row, i in enumerate(range(first, last)):
+            p.drawText(0, row * h, gutter - 4, h, Qt.AlignmentFlag.AlignRight, str(i + 1))
+
+        if widest > self._max_width:
+            self._max_width = widest
+            self._update_scrollbars()
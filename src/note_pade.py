@@ -1,10 +1,19 @@
 from PyQt6.QtWidgets import QPlainTextEdit, QTextEdit
-from PyQt6.QtGui import QTextCursor, QTextCharFormat, QColor, QFont, QPainter
-from PyQt6.QtCore import Qt, QRect
-import re
+from PyQt6.QtGui import (QTextCursor, QTextCharFormat, QColor, QFont, QFontMetrics, QPainter, QPainterPath, QPen,
+                         QStaticText)
+from PyQt6.QtCore import Qt, QRect, QPointF
+import time
 from src.highlighters.python_highlighter import PythonHighlighter
 from src.highlighters.gfx_highlighter import GFXHighlighter
+from src.highlighters.lazy_highlighter import LazyHighlighter, LAZY_MIN_BLOCKS
+from src.highlighters.span_cache import SPAN_CACHE
 from src.line_number_area import LineNumberArea
+from src.gfx_parser import GFXParser
+from src.parse_tree import SLCParseTree
+from src.diagnostics import DiagnosticSources
+from src.slc_lint import lint_line, LintData
+
+_WAVE_PEN = QPen(QColor("#ff5555"), 1)
 
 
 class CodeEditor(QPlainTextEdit):
@@ -19,6 +28,7 @@ class CodeEditor(QPlainTextEdit):
 
         # линия слева (нумерация)
         self.line_number_area = LineNumberArea(self)
+        self._reserved_lines = 0
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
         self.cursorPositionChanged.connect(self.highlight_current_line)
@@ -27,17 +37,43 @@ class CodeEditor(QPlainTextEdit):
         # состояние
         self.highlighter = None
         self.current_language = None
+        self._line_selection = []
         self._err_selection = []
-        self._diagnostics = []
+
+        # диагностики рисуются поверх текста только для видимых строк (см. paintEvent);
+        # шрифт и раскладка сообщений считаются один раз
+        self.diagnostics = DiagnosticSources()     # "lint", "parse", "python" — см. show_diagnostics
+        self._diag_font = QFont("Consolas", 10)
+        self._diag_metrics = QFontMetrics(self._diag_font)
+        self._diag_texts = {}               # сообщение → (QStaticText, ширина)
+        self._block_count = self.document().blockCount()
+        self._visible_key = self._visible = None
+
+        # проверка SLC по блокам: QTextCursor-выделения правок, ещё не проверенных
+        # (Qt сам сдвигает их при следующих правках); результат блока — в его LintData
+        self._lint_pending = []
+
+        # дерево разбора SLC, обновляется по правкам документа
+        self.parse_tree = None
+        self.document().contentsChange.connect(self._on_contents_change)
 
     # ======= Линии =======
     def line_number_area_width(self):
-        digits = len(str(max(1, self.blockCount())))
+        digits = len(str(max(1, self.blockCount(), self._reserved_lines)))
         return 10 + self.fontMetrics().horizontalAdvance('9') * digits
 
     def update_line_number_area_width(self, _):
         self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
 
+    def reserve_line_numbers(self, count: int):
+        """Ширина нумерации сразу под count строк (0 — по документу).
+
+        Смена полей перераскладывает весь документ: при загрузке по частям ширину
+        задаём один раз, пока документ пуст, а не при каждом новом разряде.
+        """
+        self._reserved_lines = count
+        self.update_line_number_area_width(0)
+
     def update_line_number_area(self, rect, dy):
         if dy:
             self.line_number_area.scroll(0, dy)
@@ -58,7 +94,7 @@ class CodeEditor(QPlainTextEdit):
         num = block.blockNumber()
         top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
         bottom = top + int(self.blockBoundingRect(block).height())
-        diag_lines = {d["line"] for d in self._diagnostics}
+        diag_lines = self.diagnostics.lines_between(*self.visible_lines()) if len(self.diagnostics) else ()
         while block.isValid() and top <= event.rect().bottom():
             if block.isVisible() and bottom >= event.rect().top():
                 n = str(num + 1)
@@ -74,127 +110,283 @@ class CodeEditor(QPlainTextEdit):
             bottom = top + int(self.blockBoundingRect(block).height())
             num += 1
 
+    def visible_lines(self):
+        """(первая, последняя) строки, попадающие в окно, с 1; пересчитываются, только когда окно сдвинулось"""
+        block = self.firstVisibleBlock()
+        offset = self.contentOffset()
+        height = self.viewport().height()
+        key = (block.blockNumber(), offset.y(), height, self.blockCount())
+        if self._visible_key == key:
+            return self._visible
+        first = last = block.blockNumber() + 1
+        while block.isValid() and self.blockBoundingGeometry(block).translated(offset).top() <= height:
+            last = block.blockNumber() + 1
+            block = block.next()
+        self._visible_key, self._visible = key, (first, last)
+        return first, last
+
     def highlight_current_line(self):
-        extra = []
         sel = QTextEdit.ExtraSelection()
         sel.format.setBackground(QColor("#3b3e4a"))
         sel.format.setProperty(QTextCharFormat.Property.FullWidthSelection, True)
         sel.cursor = self.textCursor()
-        extra.append(sel)
-        self.setExtraSelections(extra + self._err_selection)
+        self._line_selection = [sel]
+        self._apply_extra_selections()
+
+    def _apply_extra_selections(self):
+        self.setExtraSelections(self._line_selection + self._err_selection)
 
     # ======= Подсветка =======
     def set_language(self, ext: str):
         ext = ext.lower().strip()
-        if self.highlighter:
-            self.highlighter.setDocument(None)
+        self.clear_highlighter()
+        self.clear_diagnostics()        # они были для прежнего текста
         if ext == ".py":
-            self.highlighter = PythonHighlighter(self.document())
+            highlighter = PythonHighlighter(None)
             self.current_language = "Python"
         elif ext in [".gfx", ".slc"]:
-            self.highlighter = GFXHighlighter(self.document())
+            highlighter = GFXHighlighter(None)
             self.current_language = "SLC"
         else:
-            self.highlighter = None
+            highlighter = None
             self.current_language = None
-        if self.highlighter:
-            self.highlighter.rehighlight()
-            print(f"🎨 Подсветка активна: {self.current_language}")
+        if self.current_language == "SLC":
+            self.parse_tree = SLCParseTree(self.text_range, self.document_length)
+            self._lint_pending = []
+            self._mark_lint(0, self.document_length())
         else:
+            self.parse_tree = None
+            self._lint_pending = []
+        if highlighter is None:
             print("🎨 Подсветка отключена")
+        elif self.blockCount() >= LAZY_MIN_BLOCKS:
+            # большой файл: сначала экран, остальное — в свободное время
+            self.highlighter = LazyHighlighter(self, highlighter)
+            print(f"🎨 Подсветка активна: {self.current_language} (постепенно, {self.blockCount()} строк)")
+        else:
+            self.highlighter = highlighter
+            highlighter.setDocument(self.document())
+            highlighter.rehighlight()
+            print(f"🎨 Подсветка активна: {self.current_language} ({SPAN_CACHE.summary()})")
+
+    def clear_highlighter(self, keep_formats: bool = False):
+        """Снимает подсветку; ленивая подсветка останавливается.
+
+        keep_formats — не стирать форматы ленивой подсветки (весь текст сейчас заменят).
+        """
+        if isinstance(self.highlighter, LazyHighlighter):
+            self.highlighter.cancel(clear_formats=not keep_formats)
+        elif self.highlighter:
+            self.highlighter.setDocument(None)
+        self.highlighter = None
+
+    # ======= Дерево разбора SLC =======
+    def text_range(self, start: int, end: int) -> str:
+        """Кусок документа [start, end) в том же виде, что и toPlainText()"""
+        cur = QTextCursor(self.document())
+        cur.setPosition(start)
+        cur.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        return cur.selectedText().replace("\u2029", "\n").replace("\u2028", "\n").replace("\xa0", " ")
+
+    def document_length(self) -> int:
+        return self.document().characterCount() - 1
+
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        if self.parse_tree is not None:
+            self.parse_tree.apply_edit(position, removed, added)
+        doc = self.document()
+        count = doc.blockCount()
+        if len(self.diagnostics):
+            block = doc.findBlock(position)
+            end = doc.findBlock(min(position + added, doc.characterCount() - 1))
+            added_lines = end.blockNumber() - block.blockNumber()
+            removed_lines = added_lines - (count - self._block_count)
+            self.diagnostics.apply_edit(block.blockNumber() + 1, position - block.position(),
+                                        removed_lines, added_lines)
+        self._block_count = count
+        if self.current_language == "SLC":
+            self._mark_lint(position, position + added)
+
+    def parse_scene(self):
+        """Объекты SLC-сцены; перепарсиваются только блоки, изменённые с прошлого раза"""
+        if self.parse_tree is None:
+            return GFXParser(self.toPlainText()).parse()
+        return self.parse_tree.objects()
+
+    def select_text(self, start: int, end: int):
+        """Выделяет [start, end) в смещениях строки toPlainText() и прокручивает к выделению"""
+        text = self.toPlainText()
+        # позиции документа считаются в UTF-16: символы вне BMP занимают две
+        start16 = len(text[:start].encode("utf-16-le")) // 2
+        end16 = start16 + len(text[start:end].encode("utf-16-le")) // 2
+        cur = self.textCursor()
+        cur.setPosition(start16)
+        cur.setPosition(end16, QTextCursor.MoveMode.KeepAnchor)
+        self.setTextCursor(cur)
+        self.centerCursor()
+        self.setFocus()
 
     # ======= Проверка синтаксиса SLC =======
     def check_syntax(self, code: str):
-        """Простая проверка синтаксиса для SLC"""
+        """Простая проверка синтаксиса для SLC — всего текста code сразу"""
         if getattr(self, "current_language", None) != "SLC":
             return True, None, None, None
 
-        self.clear_diagnostics()
+        self.clear_diagnostics("lint")
 
-        lines = code.splitlines()
-        required_keywords = ["Create", "Style", "{", "}"]
         errors = []
-
-        for i, line in enumerate(lines, start=1):
-            text = line.strip()
-
-            if not text:
-                continue
-
-            # Ошибка: нет фигурной скобки
-            if re.search(r"Create\s+\w+", text) and not text.endswith("{"):
-                errors.append((i, len(text), "❌ Ожидается '{' после команды Create"))
-
-            # Ошибка: Style без фигурных скобок
-            if text.startswith("Style") and "{" not in text:
-                errors.append((i, len(text), "❌ Пропущена '{' после Style"))
-
-            # Ошибка: неизвестная команда
-            if not any(text.startswith(k) for k in ["Create", "Style", "}", "{"]) and not text.startswith("//"):
-                if ":" not in text and not text.endswith("}"):
-                    errors.append((i, 1, f"⚠ Неизвестная инструкция: {text}"))
+        for i, line in enumerate(code.splitlines(), start=1):
+            errors.extend((i, col, msg) for col, msg in lint_line(line))
 
         if errors:
-            for line, col, msg in errors:
-                self.show_diagnostic(line, col, msg)
+            self.show_diagnostics([{"line": line, "col": col, "message": msg} for line, col, msg in errors], "lint")
             return False, errors[0][2], errors[0][0], errors[0][1]
 
         return True, None, None, None
 
-    # ======= Отрисовка ошибки =======
-    def show_diagnostic(self, line: int, col: int, message: str, length: int = 1):
-        block = self.document().findBlockByNumber(line - 1)
-        if not block.isValid():
-            return
-        start = block.position() + col - 1
-        end = start + length
-
-        fmt = QTextCharFormat()
-        fmt.setUnderlineStyle(QTextCharFormat.UnderlineStyle.WaveUnderline)
-        fmt.setUnderlineColor(QColor("#ff5555"))
-
-        sel = QTextEdit.ExtraSelection()
-        cur = self.textCursor()
+    def _mark_lint(self, start: int, end: int):
+        cur = QTextCursor(self.document())
         cur.setPosition(start)
-        cur.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
-        sel.cursor = cur
-        sel.format = fmt
+        cur.setPosition(min(end, self.document_length()), QTextCursor.MoveMode.KeepAnchor)
+        self._lint_pending.append(cur)
+
+    def lint_pending(self, budget: float = None) -> bool:
+        """Проверяет блоки, изменённые с прошлого раза, и обновляет их диагностики.
+
+        Остальные блоки не трогаются, так что цена — по размеру правки, а не файла.
+        budget — секунд на вызов, недопроверенное остаётся до следующего; True — проверено всё.
+        """
+        deadline = None if budget is None else time.perf_counter() + budget
+        doc = self.document()
+        store = self.diagnostics.store("lint")
+        while self._lint_pending:
+            cur = self._lint_pending[0]
+            block = doc.findBlock(cur.selectionStart())
+            last = doc.findBlock(cur.selectionEnd())
+            if not last.isValid():
+                last = doc.lastBlock()
+            first_line, last_line = block.blockNumber() + 1, last.blockNumber() + 1
+            items = []
+            line = first_line
+            while True:
+                items.extend((line, col, 1, msg) for col, msg in self._lint_block(block))
+                if line == last_line or (deadline and line % 64 == 0 and time.perf_counter() > deadline):
+                    break
+                block = block.next()
+                line += 1
+            store.replace_lines(first_line, line, items)
+            if line == last_line:
+                self._lint_pending.pop(0)
+            else:
+                end = cur.selectionEnd()
+                cur.setPosition(block.next().position())
+                cur.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            if deadline and time.perf_counter() > deadline:
+                break
+        self._refresh_diagnostics()
+        return not self._lint_pending
+
+    @staticmethod
+    def _lint_block(block):
+        """Ошибки строки блока; пока текст блока прежний, берутся из его LintData"""
+        text = block.text()
+        data = block.userData()
+        if isinstance(data, LintData) and data.text == text:
+            return data.problems
+        problems = lint_line(text)
+        # LintData — только у строк с ошибками: чистую строку дешевле проверить заново,
+        # чем держать миллион объектов, которые обходит сборщик мусора
+        block.setUserData(LintData(text, problems) if problems else None)
+        return problems
 
-        self._err_selection.append(sel)
-        self.setExtraSelections(self._err_selection)
-        rect = self.cursorRect(cur)
-        self._diagnostics.append({"line": line, "y": rect.top(), "message": message})
+    # ======= Отрисовка ошибки =======
+    def show_diagnostic(self, line: int, col: int, message: str, length: int = 1, source: str = "parse"):
+        if 1 <= line <= self.blockCount():
+            self.diagnostics.store(source).add(line, col, length, message)
+        self._refresh_diagnostics()
+
+    def show_diagnostics(self, diagnostics, source: str = "parse"):
+        """Все диагностики {"line","col","length","message"} разом — одна перерисовка.
+
+        source — чьи это записи: "lint" (проверка строк), "parse" (разбор по F5), "python";
+        у каждого источника свои записи, они не затирают чужие.
+        """
+        count = self.blockCount()
+        self.diagnostics.store(source).extend((d["line"], d["col"], d.get("length", 1), d["message"])
+                                              for d in diagnostics if 1 <= d["line"] <= count)
+        self._refresh_diagnostics()
+
+    def clear_diagnostics(self, source: str = None):
+        """Диагностики источника source; без него — все (и подсветку ошибки)"""
+        if source is None:
+            self._err_selection = []
+            self._diag_texts.clear()
+        self.diagnostics.clear(source)
+        self._refresh_diagnostics()
+
+    def _refresh_diagnostics(self):
+        self.line_number_area.update()
         self.viewport().update()
 
-    def clear_diagnostics(self):
-        self._err_selection = []
-        self._diagnostics = []
-        self.setExtraSelections([])
-        self.viewport().update()
+    def _diagnostic_text(self, message: str):
+        entry = self._diag_texts.get(message)
+        if entry is None:
+            text = QStaticText(message)
+            text.prepare(font=self._diag_font)
+            entry = self._diag_texts[message] = (text, self._diag_metrics.horizontalAdvance(message))
+        return entry
 
     # ======= Отрисовка текста ошибки =======
     def paintEvent(self, e):
         super().paintEvent(e)
-        if not self._diagnostics:
+        if not len(self.diagnostics):
+            return
+        visible = self.diagnostics.between(*self.visible_lines())
+        if not visible:
             return
         p = QPainter(self.viewport())
         p.setRenderHint(QPainter.RenderHint.Antialiasing)
-        for d in self._diagnostics:
-            msg = d["message"]
-            y = d["y"]
-            p.setFont(QFont("Consolas", 10))
-            fm = p.fontMetrics()
-            w = fm.horizontalAdvance(msg)
-            h = fm.height()
-            pad = 6
-            bg = QRect(12 + self.line_number_area_width(), y - h, w + pad * 2, h + pad)
+        p.setFont(self._diag_font)
+        h = self._diag_metrics.height()
+        pad = 6
+        left = 12 + self.line_number_area_width()
+        offset = self.contentOffset()
+        doc = self.document()
+        x, previous = left, None
+        for line, col, length, msg in visible:
+            block = doc.findBlockByNumber(line - 1)
+            y = int(self.blockBoundingGeometry(block).translated(offset).top())
+            self._paint_wave(p, block, col, length)
+            text, w = self._diagnostic_text(msg)
+            # несколько сообщений одной строки (разных источников) — рядом, а не друг на друге
+            x = x if line == previous else left
+            previous = line
+            bg = QRect(x, y - h, w + pad * 2, h + pad)
+            x = bg.right() + pad
             p.setPen(QColor("#ff5555"))
             p.setBrush(QColor(255, 0, 0, 40))
             p.drawRoundedRect(bg, 6, 6)
             p.setPen(QColor("#ffaaaa"))
-            p.drawText(bg.adjusted(pad, 0, -pad, 0), Qt.AlignmentFlag.AlignVCenter, msg)
-
+            p.drawStaticText(bg.left() + pad, bg.top() + (bg.height() - h) // 2, text)
 
+    def _paint_wave(self, p: QPainter, block, col: int, length: int):
+        """Волнистое подчёркивание символов [col, col + length) строки block"""
+        end_of_line = block.position() + block.length() - 1
+        start = min(block.position() + col - 1, end_of_line)
+        cur = QTextCursor(block)
+        cur.setPosition(start)
+        left = self.cursorRect(cur)
+        cur.setPosition(min(start + length, end_of_line))
+        right = self.cursorRect(cur).left()
+        if right <= left.left():
+            return
+        y = left.bottom() - 1
+        wave = QPainterPath(QPointF(left.left(), y))
+        for i, x in enumerate(range(left.left() + 2, right + 1, 2)):
+            wave.lineTo(x, y - 2 if i % 2 == 0 else y)
+        p.setPen(_WAVE_PEN)
+        p.setBrush(Qt.BrushStyle.NoBrush)
+        p.drawPath(wave)
 
     def highlight_error(self, line: int, col: int = 0, msg: str = ""):
         
@@ -208,14 +400,11 @@ class CodeEditor(QPlainTextEdit):
 
             sel = QTextEdit.ExtraSelection()
             sel.format = fmt
-            sel.cursor = self.textCursor()
-
-            sel.cursor.movePosition(QTextCursor.MoveOperation.Start)
-            for _ in range(line - 1):
-                sel.cursor.movePosition(QTextCursor.MoveOperation.Down)
+            block = self.document().findBlockByNumber(max(0, line - 1))
+            sel.cursor = QTextCursor(block if block.isValid() else self.document().lastBlock())
             self._err_selection = [sel]
 
-            self.setExtraSelections(self._err_selection)
+            self._apply_extra_selections()
             print(f"🔴 Ошибка подсвечена на строке {line}")
 
         except Exception as e:
@@ -224,5 +413,4 @@ class CodeEditor(QPlainTextEdit):
     def clear_error_highlight(self):   
         """Убирает подсветку ошибок"""
         self._err_selection = []
-        self.setExtraSelections([])
-        
+        self._apply_extra_selections()
@@ -0,0 +1,77 @@
+import hashlib
+import os
+
+from src.gfx_parser import PARSER_VERSION
+from src.scene import COMPILED_EXT, FORMAT_VERSION, Scene
+
+CACHE_DIR_NAME = ".slc_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ParseCache:
+    """Кэш разобранных сцен на диске: <проект>/.slc_cache/<sha256>.slcc.
+
+    Ключ — хеш текста вместе с версиями парсера и формата сцены, так что
+    изменённый файл или новый парсер просто не находят старую запись.
+    Размер каталога ограничен max_bytes: при переполнении удаляются записи,
+    которые дольше всех не читались (LRU по mtime, он обновляется при чтении).
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = os.path.join(root, CACHE_DIR_NAME)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(text: str) -> str:
+        h = hashlib.sha256(f"slc:{PARSER_VERSION}:{FORMAT_VERSION}\0".encode())
+        h.update(text.encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.path, key + COMPILED_EXT)
+
+    def load(self, key: str):
+        """Scene из кэша (отображённая в память, только для чтения) или None"""
+        path = self._entry(key)
+        try:
+            scene = Scene.load(path)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, TypeError) as e:
+            print(f"⚠️ Повреждённая запись кэша {key[:12]}: {e}")
+            self._remove(path)
+            return None
+        return scene
+
+    def store(self, key: str, scene: Scene):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            scene.save(self._entry(key))
+            self.evict()
+        except OSError as e:
+            print(f"⚠️ Не удалось записать кэш: {e}")
+
+    def evict(self):
+        """Удаляет самые давние записи, пока каталог не уложится в max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if entry.name.endswith(COMPILED_EXT) and entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
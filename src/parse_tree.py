@@ -0,0 +1,215 @@
+import re
+from bisect import bisect_left
+
+from src.gfx_parser import GFXParser
+
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+
+class _Fenwick:
+    """Дерево Фенвика над длинами: префиксные суммы и поиск позиции за O(log n)"""
+
+    def __init__(self, values):
+        n = len(values)
+        tree = [0] + list(values)
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.size = n
+
+    def add(self, i: int, delta: int):
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        """Сумма первых i значений"""
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def search(self, pos: int) -> int:
+        """Наибольшее i, при котором prefix(i) <= pos"""
+        i = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            j = i + step
+            if j <= self.size and self.tree[j] <= pos:
+                i = j
+                pos -= self.tree[j]
+            step >>= 1
+        return i
+
+
+class TreeState:
+    """Результат SLCParseTree.build: объекты, ошибка и раскладка блоков фигур в документе"""
+    __slots__ = ("objects", "error", "spans", "head", "gaps", "block_len", "isolated", "style_owner",
+                 "is_list")
+
+
+class SLCParseTree:
+    """Постоянное дерево разбора SLC-документа с инкрементальным обновлением.
+
+    apply_edit() получает изменения документа (как QTextDocument.contentsChange) и
+    перепарсивает только блок фигуры, внутри которого была правка; объекты остальных
+    фигур переиспользуются. Правки, меняющие структуру (между фигурами, в заголовке
+    списка, добавление/удаление фигур, ошибки), помечают дерево «грязным» — тогда
+    objects() один раз делает полный разбор.
+
+    text_at(start, end) и length() читают документ в его позициях (UTF-16).
+    """
+
+    def __init__(self, text_at, length, filename: str = None):
+        self.text_at = text_at
+        self.length = length
+        self.filename = filename
+        self._dirty = True
+        self._error = None
+        self._objects = []
+
+    @property
+    def dirty(self) -> bool:
+        """Следующий objects() выполнит полный разбор"""
+        return self._dirty
+
+    def invalidate(self):
+        self._dirty = True
+
+    def objects(self):
+        """Объекты сцены как у GFXParser.parse (SyntaxError — при ошибке в коде)"""
+        if self._dirty:
+            self._rebuild(self.text_at(0, self.length()))
+        if self._error is not None:
+            raise SyntaxError(self._error)
+        return list(self._objects)
+
+    # === Полный разбор ===
+    def _rebuild(self, text: str):
+        self.adopt(self.build(text, self.filename))
+
+    @classmethod
+    def build(cls, text: str, filename: str = None) -> "TreeState":
+        """Полный разбор text; документ не читается, так что можно выполнять в пуле потоков"""
+        state = TreeState()
+        parser = GFXParser(text, filename)
+        try:
+            state.objects = parser.parse()
+            state.error = None
+        except SyntaxError as e:
+            state.objects, state.error = [], str(e)
+        nodes = parser.nodes if state.error is None else []
+        state.spans = parser.spans if state.error is None else None
+
+        code = parser.code
+        lead = len(text) - len(text.lstrip())
+        to_doc = cls._doc_offsets(text)
+        starts = [n.start for n in nodes]
+        doc_starts = [to_doc(s + lead) for s in starts]
+        doc_end = to_doc(len(text))
+
+        state.head = doc_starts[0] if nodes else 0
+        state.gaps = [b - a for a, b in zip(doc_starts, doc_starts[1:] + [doc_end])]
+        state.block_len = []
+        state.isolated = []
+        state.style_owner = []
+        state.is_list = [n.is_list for n in nodes]
+        for i, node in enumerate(nodes):
+            if node.end is None:
+                state.block_len.append(None)
+                state.isolated.append(False)
+            else:
+                state.block_len.append(to_doc(node.end + lead) - doc_starts[i])
+                state.isolated.append(cls._is_isolated(code, node.start, node.end))
+            # из блока какой фигуры взят Style (у 'Create List' — обычно из первой фигуры)
+            state.style_owner.append(bisect_left(starts, node.style.start + 1) - 1)
+        return state
+
+    def adopt(self, state: "TreeState"):
+        """Принимает результат build() — для текста, который сейчас в документе"""
+        self._dirty = False
+        self._objects = state.objects
+        self._error = state.error
+        self._head = state.head
+        self._gaps = state.gaps
+        self._block_len = state.block_len
+        self._isolated = state.isolated
+        self._style_owner = state.style_owner
+        self._is_list = state.is_list
+        self._index = _Fenwick(self._gaps)
+        self._names = {obj["name"] for obj in self._objects}
+
+    @staticmethod
+    def _doc_offsets(text: str):
+        """Перевод смещений str в позиции документа (символы вне BMP занимают две)"""
+        astral = [] if text.isascii() else [m.start() for m in _ASTRAL_RE.finditer(text)]
+        if not astral:
+            return lambda offset: offset
+        return lambda offset: offset + bisect_left(astral, offset)
+
+    @staticmethod
+    def _is_isolated(code: str, start: int, end: int) -> bool:
+        """Блок занимает свои строки целиком: слева и справа от него на строке только пробелы"""
+        line_start = code.rfind("\n", 0, start) + 1
+        line_end = code.find("\n", end)
+        if line_end < 0:
+            line_end = len(code)
+        return not code[line_start:start].strip() and not code[end:line_end].strip()
+
+    # === Инкрементальное обновление ===
+    def apply_edit(self, position: int, removed: int, added: int):
+        """Учитывает правку документа: перепарсивает затронутый блок или помечает дерево грязным"""
+        if self._dirty:
+            return
+        if self._error is not None or not self._objects or not self._try_reparse(position, removed, added):
+            self._dirty = True
+
+    def _try_reparse(self, position: int, removed: int, added: int) -> bool:
+        rel = position - self._head
+        if rel <= 0:
+            return False
+        i = self._index.search(rel)
+        if i >= len(self._gaps):
+            return False
+        block_len = self._block_len[i]
+        # только «листовой» блок на собственных строках, правка строго внутри него;
+        # заголовок 'Create List' — ещё и объявление списка, его правка меняет структуру
+        if self._is_list[i] or block_len is None or not self._isolated[i] or self._gaps[i] < block_len:
+            return False
+        start = self._head + self._index.prefix(i)
+        if position <= start or position + removed > start + block_len - 1:
+            return False
+
+        delta = added - removed
+        parser = GFXParser(self.text_at(start, start + block_len + delta), self.filename)
+        try:
+            parsed = parser.parse_block()
+        except SyntaxError:
+            return False
+        if parsed is None:
+            return False
+        _, obj = parsed
+
+        old_name = self._objects[i]["name"]
+        if obj["name"] != old_name:
+            if obj["name"] in self._names:
+                return False
+            self._names.discard(old_name)
+            self._names.add(obj["name"])
+
+        self._objects[i] = obj
+        self._block_len[i] += delta
+        self._gaps[i] += delta
+        self._index.add(i, delta)
+        # предыдущие фигуры без своего Style теперь берут его из этого блока
+        self._style_owner[i] = i
+        j = i - 1
+        while j >= 0 and self._style_owner[j] >= i:
+            self._objects[j] = dict(self._objects[j], style=dict(obj["style"]))
+            self._style_owner[j] = i
+            j -= 1
+        return True
@@ -0,0 +1,61 @@
+import ast
+
+try:
+    from pyflakes.checker import Checker
+except ImportError:     # без pyflakes из «лишних имён» проверяются только неиспользованные импорты
+    Checker = None
+
+# === Проверка Python ===
+# Выполняется в отдельном процессе (PythonLinter), поэтому модуль не зависит от Qt:
+# только текст на входе и список диагностик {"line","col","length","message"} на выходе.
+
+
+def check_python(text: str, filename: str = "<editor>"):
+    """Диагностики текста Python: синтаксис (ast + compile) и неиспользованные имена"""
+    try:
+        tree = ast.parse(text, filename)
+        # compile находит то, чего не видит разбор: return вне функции, nonlocal без пары…
+        compile(tree, filename, "exec")
+    except SyntaxError as e:
+        line = e.lineno or 1
+        col = e.offset or 1
+        end = e.end_offset if e.end_lineno == e.lineno and e.end_offset else col + 1
+        return [{"line": line, "col": col, "length": max(1, end - col), "message": f"❌ {e.msg}"}]
+    except (ValueError, RecursionError) as e:      # нулевой байт, слишком глубокая вложенность
+        return [{"line": 1, "col": 1, "length": 1, "message": f"❌ {e}"}]
+
+    if Checker is not None:
+        return sorted(
+            ({"line": m.lineno, "col": m.col + 1, "length": 1, "message": "⚠ " + m.message % m.message_args}
+             for m in Checker(tree, filename).messages),
+            key=lambda d: (d["line"], d["col"]),
+        )
+    return _unused_imports(tree)
+
+
+def _unused_imports(tree):
+    imported = {}           # имя → alias, где оно импортировано первый раз
+    used = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                continue
+            for alias in node.names:
+                if alias.name != "*":
+                    imported.setdefault(alias.asname or alias.name.split(".")[0], alias)
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__"
+                                                  for t in node.targets):
+            # имена из __all__ экспортируются — значит, используются
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                used.update(elt.value for elt in node.value.elts
+                            if isinstance(elt, ast.Constant) and isinstance(elt.value, str))
+
+    return [
+        {"line": alias.lineno, "col": alias.col_offset + 1,
+         "length": max(1, alias.end_col_offset - alias.col_offset),
+         "message": f"⚠ '{name}' импортирован, но не используется"}
+        for name, alias in sorted(imported.items(), key=lambda item: (item[1].lineno, item[1].col_offset))
+        if name not in used
+    ]
@@ -0,0 +1,91 @@
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from src.python_check import check_python
+
+DEFAULT_MAX_ENTRIES = 64        # результатов в кэше: правка туда-обратно (undo) не проверяется заново
+
+
+class PythonLinter(QObject):
+    """Проверка Python (check_python) в отдельном процессе, с кэшем по хешу текста.
+
+    check(text) сразу отдаёт результат из кэша, иначе ставит проверку в очередь и
+    возвращает ключ; результат приходит сигналом finished(ключ, диагностики), ошибка
+    процесса — failed(ключ, исключение). Процесс один: пока он занят, следующий текст
+    ждёт, а ещё более новый вытесняет ждущий. Начатую проверку прервать нельзя — её
+    результат только попадает в кэш; вызывающий сравнивает ключ с последним запросом.
+    """
+
+    finished = pyqtSignal(object, object)       # ключ, список диагностик
+    failed = pyqtSignal(object, object)         # ключ, исключение
+    _result = pyqtSignal(object, object, object)    # из потока пула: ключ, диагностики, исключение
+
+    def __init__(self, parent=None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(parent)
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._pool = None
+        self._running = None            # ключ проверки, которая идёт в процессе
+        self._queued = None             # (ключ, текст) — ждёт, пока процесс освободится
+        self._result.connect(self._on_result)
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def check(self, text: str):
+        """(ключ, диагностики) — диагностики None, если проверка ушла в процесс"""
+        key = self.key(text)
+        diagnostics = self._cache.get(key)
+        if diagnostics is not None:
+            self._cache.move_to_end(key)
+            self._queued = None         # ждущий текст уже устарел
+            return key, diagnostics
+        if self._running == key:
+            self._queued = None
+        elif self._running is not None:
+            self._queued = (key, text)
+        else:
+            self._submit(key, text)
+        return key, None
+
+    def shutdown(self):
+        self._queued = None
+        self._running = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _submit(self, key: str, text: str):
+        if self._pool is None:
+            # spawn, а не fork: дочерний процесс не наследует состояние Qt
+            self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self._running = key
+        future = self._pool.submit(check_python, text)
+        future.add_done_callback(lambda f: self._result.emit(key, *self._outcome(f)))
+
+    @staticmethod
+    def _outcome(future):
+        if future.cancelled():
+            return None, None
+        error = future.exception()
+        return (None, error) if error is not None else (future.result(), None)
+
+    def _on_result(self, key, diagnostics, error):
+        self._running = None
+        if error is not None:
+            # процесс мог упасть (BrokenProcessPool) — следующий запрос поднимет новый
+            self.shutdown()
+            self.failed.emit(key, error)
+        elif diagnostics is not None:
+            self._cache[key] = diagnostics
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self.finished.emit(key, diagnostics)
+        if self._queued is not None:
+            queued, self._queued = self._queued, None
+            self._submit(*queued)
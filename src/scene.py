@@ -0,0 +1,301 @@
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# Значения по умолчанию — те же, что всегда брал GFXCanvas
+DEFAULT_COLOR = "#FFFFFF"
+DEFAULT_SIZE = 50
+
+# Откуда брать значение ключа при сборке словаря (см. Scene.layouts)
+_EXTRA, _X_INT, _X_FLOAT, _Y_INT, _Y_FLOAT = 0, 1, 2, 3, 4
+_COLOR, _WIDTH, _HEIGHT = 5, 6, 7
+
+_INT32 = 2 ** 31
+_EXACT_FLOAT = 2 ** 53
+
+# === Двоичный формат сцены ===
+# Заголовок, таблица секций (смещение, длина) и секции, выровненные по 8 байт:
+# столбцы little-endian, затем имена (UTF-8) и marshal-таблица типов/цветов/макетов/extras.
+# Файлы .slcc («скомпилированный» SLC) и записи кэша разбора хранятся в этом формате.
+COMPILED_EXT = ".slcc"
+FORMAT_MAGIC = b"SLCS"
+FORMAT_VERSION = 2                      # 2: kind и layout — uint32 (в 1 были uint16 и переполнялись)
+_HEADER = struct.Struct("<4sHHQ")       # magic, версия, число секций, число фигур
+_SECTION = struct.Struct("<QQ")         # смещение, длина
+_COLUMNS = (("kind", "I"), ("x", "d"), ("y", "d"), ("width", "i"), ("height", "i"),
+            ("color", "I"), ("layout", "I"), ("_name_end", "Q"))
+
+
+class Scene:
+    """Компактная сцена: столбцы array (struct-of-arrays) вместо списка словарей.
+
+    Столбцы kind/x/y/width/height/color уже содержат значения для отрисовки
+    (с умолчаниями GFXCanvas), строки типов и цветов интернированы. Для совместимости
+    scene[i] и итерация по сцене выдают прежние словари {"type","name","params","style"}:
+    порядок ключей и исходные значения восстанавливаются по интернированному «макету»
+    (layout) фигуры, а всё, что не легло в столбцы, хранится в extras.
+
+    Сцена из Scene.load() отображает файл в память: столбцы — memoryview прямо
+    над страницами файла (их можно отдать в numpy.frombuffer без копии), такая
+    сцена только для чтения.
+    """
+
+    def __init__(self):
+        self.types = []                 # id → имя типа ("Square", "Circle", ...)
+        self.colors = []                # id → строка цвета
+        self.layouts = []               # id → ((ключ, код), ...) для params и style
+        self.kind = array("I")
+        self.x = array("d")
+        self.y = array("d")
+        self.width = array("i")
+        self.height = array("i")
+        self.color = array("I")
+        self.layout = array("I")
+        self.extras = {}                # индекс → (значения params, значения style) вне столбцов
+        self._name_blob = bytearray()   # имена фигур подряд в UTF-8
+        self._name_end = array("Q")
+        self._type_ids = {}
+        self._color_ids = {}
+        self._layout_ids = {}
+        self._buffer = None             # mmap, над которым лежат столбцы (load)
+        # (начало, конец) заголовка Create каждой фигуры в исходном .slc — если сцена только
+        # что разобрана (GFXParser); в двоичную форму не сохраняется
+        self.spans = None
+
+    @property
+    def readonly(self) -> bool:
+        return self._buffer is not None
+
+    @classmethod
+    def from_objects(cls, objects):
+        scene = cls()
+        for obj in objects:
+            scene.append(obj)
+        return scene
+
+    # === Двоичная форма ===
+    def to_bytes(self) -> bytes:
+        """Сцена в компактном двоичном формате (см. FORMAT_VERSION)"""
+        tables = marshal.dumps((self.types, self.colors, self.layouts, self.extras))
+        sections = []
+        for attr, _ in _COLUMNS:
+            column = getattr(self, attr)
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            sections.append(column.tobytes())
+        sections += [bytes(self._name_blob), tables]
+
+        out = bytearray(_HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, len(sections), len(self)))
+        offset = _align(len(out) + _SECTION.size * len(sections))
+        for data in sections:
+            out += _SECTION.pack(offset, len(data))
+            offset = _align(offset + len(data))
+        for data in sections:
+            out += bytes(_align(len(out)) - len(out)) + data
+        return bytes(out)
+
+    def save(self, path: str):
+        """Записывает сцену в файл (.slcc) атомарно: через временный файл"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Scene":
+        """Сцена из файла без копирования: столбцы смотрят прямо в mmap файла"""
+        with open(path, "rb") as f:
+            # на big-endian хосте столбцы всё равно надо переставлять — читаем копией
+            if sys.byteorder == "big":
+                return cls.from_bytes(f.read())
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:      # пустой файл не отображается
+                raise ValueError("❌ Это не файл сцены SLC")
+        scene = cls.from_bytes(mm, copy=False)
+        scene._buffer = mm
+        return scene
+
+    @classmethod
+    def from_bytes(cls, data, copy: bool = True) -> "Scene":
+        """Читает сцену из to_bytes(); ValueError, если данные не того формата.
+
+        copy=False — столбцы остаются memoryview над data (data должен жить, пока жива сцена).
+        """
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError("❌ Это не файл сцены SLC")
+        magic, version, n_sections, count = _HEADER.unpack_from(view)
+        if magic != FORMAT_MAGIC or version != FORMAT_VERSION or n_sections != len(_COLUMNS) + 2:
+            raise ValueError("❌ Неподдерживаемый формат сцены SLC")
+        sections = []
+        for i in range(n_sections):
+            offset, length = _SECTION.unpack_from(view, _HEADER.size + i * _SECTION.size)
+            if offset + length > len(view):
+                raise ValueError("❌ Файл сцены SLC обрезан")
+            sections.append(view[offset:offset + length])
+
+        scene = cls()
+        for (attr, typecode), data in zip(_COLUMNS, sections):
+            if len(data) != count * array(typecode).itemsize:
+                raise ValueError("❌ Файл сцены SLC повреждён")
+            if copy:
+                column = array(typecode)
+                column.frombytes(data)
+                if sys.byteorder == "big":
+                    column.byteswap()
+            else:
+                column = data.cast(typecode)
+            setattr(scene, attr, column)
+        scene._name_blob = bytearray(sections[-2]) if copy else sections[-2]
+        scene.types, scene.colors, scene.layouts, scene.extras = marshal.loads(sections[-1])
+        scene._type_ids = {t: i for i, t in enumerate(scene.types)}
+        scene._color_ids = {c: i for i, c in enumerate(scene.colors)}
+        scene._layout_ids = {l: i for i, l in enumerate(scene.layouts)}
+        return scene
+
+    def __len__(self):
+        return len(self.kind)
+
+    def __iter__(self):
+        for i in range(len(self.kind)):
+            yield self[i]
+
+    def __getitem__(self, i: int):
+        """Объект фигуры в прежнем виде словаря"""
+        if i < 0:
+            i += len(self.kind)
+        params_spec, style_spec = self.layouts[self.layout[i]]
+        params_extra, style_extra = self.extras.get(i, ((), ()))
+        params_extra, style_extra = iter(params_extra), iter(style_extra)
+
+        params = {}
+        for key, code in params_spec:
+            if code == _X_INT:
+                params[key] = int(self.x[i])
+            elif code == _X_FLOAT:
+                params[key] = self.x[i]
+            elif code == _Y_INT:
+                params[key] = int(self.y[i])
+            elif code == _Y_FLOAT:
+                params[key] = self.y[i]
+            else:
+                params[key] = next(params_extra)
+        style = {}
+        for key, code in style_spec:
+            if code == _COLOR:
+                style[key] = self.colors[self.color[i]]
+            elif code == _WIDTH:
+                style[key] = str(self.width[i])
+            elif code == _HEIGHT:
+                style[key] = str(self.height[i])
+            else:
+                style[key] = next(style_extra)
+        return {"type": self.types[self.kind[i]], "name": self.name(i), "params": params, "style": style}
+
+    def to_objects(self):
+        return list(self)
+
+    def name(self, i: int) -> str:
+        start = self._name_end[i - 1] if i else 0
+        return str(self._name_blob[start:self._name_end[i]], "utf-8")
+
+    @property
+    def name_data(self):
+        """Столбец имён как есть: (имена подряд в UTF-8, конец каждого имени)"""
+        return self._name_blob, self._name_end
+
+    def name_keys(self, start: int = 0, stop: int = None):
+        """Имена фигур [start, stop) байтами UTF-8, без декодирования — для сравнения сцен"""
+        ends = self._name_end[start:stop]
+        first = self._name_end[start - 1] if start else 0
+        blob = bytes(self._name_blob[first:ends[-1]]) if len(ends) else b""
+        return [blob[a - first:b - first] for a, b in zip([first, *ends], ends)]
+
+    def same_names(self, other: "Scene") -> bool:
+        """Те же имена в том же порядке"""
+        return len(self) == len(other) and bytes(self._name_end) == bytes(other._name_end) \
+            and bytes(self._name_blob) == bytes(other._name_blob)
+
+    def type_name(self, i: int) -> str:
+        return self.types[self.kind[i]]
+
+    def color_name(self, i: int) -> str:
+        return self.colors[self.color[i]]
+
+    # === Добавление фигур ===
+    def append(self, obj):
+        """Добавляет фигуру из словаря в формате GFXParser.parse"""
+        if self.readonly:
+            raise TypeError("❌ Сцена из файла .slcc только для чтения")
+        params, style = obj.get("params", {}), obj.get("style", {})
+        index = len(self.kind)
+        x = y = 0
+        width = height = DEFAULT_SIZE
+        color = DEFAULT_COLOR
+        params_spec, params_extra = [], []
+        style_spec, style_extra = [], []
+
+        for key, val in params.items():
+            code = _EXTRA
+            if key in ("x", "y") and type(val) in (int, float) and abs(val) < _EXACT_FLOAT:
+                if key == "x":
+                    x, code = val, _X_INT if type(val) is int else _X_FLOAT
+                else:
+                    y, code = val, _Y_INT if type(val) is int else _Y_FLOAT
+            if code == _EXTRA:
+                params_extra.append(val)
+            params_spec.append((key, code))
+
+        for key, val in style.items():
+            code = _EXTRA
+            if key == "color":
+                color, code = val, _COLOR
+            elif key in ("width", "height"):
+                size = self._size(val)
+                if key == "width":
+                    width = size
+                else:
+                    height = size
+                if str(size) == val:
+                    code = _WIDTH if key == "width" else _HEIGHT
+            if code == _EXTRA:
+                style_extra.append(val)
+            style_spec.append((key, code))
+
+        self.kind.append(self._intern(self._type_ids, self.types, obj["type"]))
+        self.x.append(x)
+        self.y.append(y)
+        self.width.append(width)
+        self.height.append(height)
+        self.color.append(self._intern(self._color_ids, self.colors, color))
+        self.layout.append(self._intern(self._layout_ids, self.layouts, (tuple(params_spec), tuple(style_spec))))
+        self._name_blob += obj["name"].encode("utf-8")
+        self._name_end.append(len(self._name_blob))
+        if params_extra or style_extra:
+            self.extras[index] = (tuple(params_extra), tuple(style_extra))
+
+    @staticmethod
+    def _size(value) -> int:
+        """Размер для отрисовки: целое из строки стиля, иначе умолчание"""
+        try:
+            size = int(value)
+        except (TypeError, ValueError):
+            return DEFAULT_SIZE
+        return size if -_INT32 <= size < _INT32 else DEFAULT_SIZE
+
+    @staticmethod
+    def _intern(ids: dict, table: list, value) -> int:
+        i = ids.get(value)
+        if i is None:
+            i = ids[value] = len(table)
+            table.append(value)
+        return i
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
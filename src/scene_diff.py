@@ -0,0 +1,150 @@
+from bisect import bisect_left
+
+from src.scene import Scene
+
+try:
+    import numpy as np
+except ImportError:     # без numpy сравнение то же, но циклом Python
+    np = None
+
+# Больше изменённых прямоугольников — дешевле перерисовать всё
+MAX_CHANGED_BOXES = 4096
+
+# typecode столбцов Scene → dtype numpy
+_DTYPES = {"kind": "u4", "color": "u4", "x": "f8", "y": "f8", "width": "i4", "height": "i4"}
+
+
+def changed_boxes(old: Scene, new: Scene, limit: int = MAX_CHANGED_BOXES):
+    """Прямоугольники сцены (left, top, right, bottom), где картинка new может отличаться от old.
+
+    Фигуры сопоставляются по имени: удалённые, добавленные, изменённые и сменившие место
+    в порядке отрисовки относительно остальных. None — сравнивать не имеет смысла
+    (имена повторяются или изменений больше limit): перерисовать всё.
+    """
+    if old.same_names(new):
+        old_of_new = range(len(new))
+        removed = []
+    else:
+        # одинаковые начало и конец списка фигур сопоставляются по месту, по имени — только середина
+        head, tail = _common_names(old, new) if np is not None else (0, 0)
+        old_stop, new_stop = len(old) - tail, len(new) - tail
+        new_names = new.name_keys(head, new_stop)
+        old_index = {name: i for i, name in enumerate(old.name_keys(head, old_stop), head)}
+        if len(old_index) != old_stop - head or len(set(new_names)) != len(new_names):
+            return None
+        old_of_new = [
+            *range(head),
+            *[old_index.pop(name, -1) for name in new_names],      # -1 — новая фигура
+            *range(old_stop, len(old)),
+        ]
+        removed = list(old_index.values())
+
+    if np is not None:
+        changed_old, changed_new = _changed_numpy(old, new, old_of_new)
+    else:
+        changed_old, changed_new = _changed_python(old, new, old_of_new)
+    if len(changed_old) + len(changed_new) + len(removed) > limit:
+        return None
+    return [_box(old, i) for i in (*changed_old, *removed)] + [_box(new, i) for i in changed_new]
+
+
+def _common_names(old: Scene, new: Scene):
+    """(head, tail): у скольких первых и последних фигур old и new совпадают имена"""
+    n = min(len(old), len(new))
+    if not n:
+        return 0, 0
+    (old_blob, old_ends), (new_blob, new_ends) = old.name_data, new.name_data
+    old_bytes, new_bytes = np.frombuffer(old_blob, np.uint8), np.frombuffer(new_blob, np.uint8)
+    old_ends, new_ends = np.frombuffer(old_ends, np.uint64), np.frombuffer(new_ends, np.uint64)
+
+    def common(a, b, a_ends, b_ends):
+        # имена совпадают, пока совпадают их границы и все байты до конца имени
+        m = min(len(a), len(b))
+        differ = np.flatnonzero(a[:m] != b[:m])
+        same_bytes = differ[0] if len(differ) else m
+        differ = np.flatnonzero(a_ends[:n] != b_ends[:n])
+        same_ends = differ[0] if len(differ) else n
+        return int(min(same_ends, np.searchsorted(a_ends[:n], same_bytes, "right")))
+
+    head = common(old_bytes, new_bytes, old_ends, new_ends)
+    # с конца: байты задом наперёд, границы — расстояния от конца до начала имени
+    old_starts = np.concatenate(([0], old_ends[:-1]))
+    new_starts = np.concatenate(([0], new_ends[:-1]))
+    tail = common(old_bytes[::-1], new_bytes[::-1],
+                  (len(old_bytes) - old_starts)[::-1], (len(new_bytes) - new_starts)[::-1])
+    return head, min(tail, n - head)
+
+
+def _changed_numpy(old: Scene, new: Scene, old_of_new):
+    """(индексы в old, индексы в new) фигур, чья отрисовка изменилась; добавленные — только в new"""
+    pairs = np.asarray(old_of_new, np.int64)
+    added = np.flatnonzero(pairs < 0)
+    new_idx = np.flatnonzero(pairs >= 0)
+    old_idx = pairs[new_idx]
+
+    types, colors = {}, {}                  # общие id типов и цветов обеих сцен
+    differs = np.zeros(len(new_idx), bool)
+    for column, table, ids in (("kind", "types", types), ("color", "colors", colors)):
+        a = np.array([ids.setdefault(t, len(ids)) for t in getattr(old, table)], np.int64)
+        b = np.array([ids.setdefault(t, len(ids)) for t in getattr(new, table)], np.int64)
+        a = a[np.frombuffer(getattr(old, column), _DTYPES[column]).astype(np.int64)] if len(a) else a
+        b = b[np.frombuffer(getattr(new, column), _DTYPES[column]).astype(np.int64)] if len(b) else b
+        differs |= a[old_idx] != b[new_idx]
+    for column in ("x", "y", "width", "height"):
+        a = np.frombuffer(getattr(old, column), _DTYPES[column])
+        b = np.frombuffer(getattr(new, column), _DTYPES[column])
+        if column in ("x", "y"):
+            a, b = np.trunc(a), np.trunc(b)     # как при отрисовке: int(x)
+        differs |= a[old_idx] != b[new_idx]
+    if len(old_idx) > 1 and (np.diff(old_idx) < 0).any():
+        differs[_moved(old_idx.tolist())] = True
+
+    return old_idx[differs].tolist(), [*added.tolist(), *new_idx[differs].tolist()]
+
+
+def _changed_python(old: Scene, new: Scene, old_of_new):
+    def drawn(scene, i):
+        return (scene.types[scene.kind[i]], int(scene.x[i]), int(scene.y[i]),
+                scene.width[i], scene.height[i], scene.colors[scene.color[i]])
+
+    changed_old, changed_new = [], []
+    matched = [(i, j) for i, j in enumerate(old_of_new) if j >= 0]
+    moved = set(_moved([j for _, j in matched]))
+    for k, (i, j) in enumerate(matched):
+        if k in moved or drawn(old, j) != drawn(new, i):
+            changed_old.append(j)
+            changed_new.append(i)
+    changed_new += [i for i, j in enumerate(old_of_new) if j < 0]
+    return changed_old, changed_new
+
+
+def _moved(order):
+    """Позиции фигур, сменивших место в порядке отрисовки: все, кроме наибольшей
+    возрастающей подпоследовательности order (старых индексов в новом порядке).
+
+    Если две фигуры поменялись местами, хотя бы одна из них не в этой подпоследовательности —
+    и её прямоугольник накрывает их пересечение.
+    """
+    tails, tail_pos, prev = [], [], [-1] * len(order)
+    for k, j in enumerate(order):
+        t = bisect_left(tails, j)
+        if t:
+            prev[k] = tail_pos[t - 1]
+        if t == len(tails):
+            tails.append(j)
+            tail_pos.append(k)
+        else:
+            tails[t] = j
+            tail_pos[t] = k
+    kept = [False] * len(order)
+    k = tail_pos[-1] if tail_pos else -1
+    while k >= 0:
+        kept[k] = True
+        k = prev[k]
+    return [k for k, keep in enumerate(kept) if not keep]
+
+
+def _box(scene: Scene, i: int):
+    # как в GridIndex: отрицательная ширина/высота рисуется «в другую сторону»
+    x, y, w, h = int(scene.x[i]), int(scene.y[i]), scene.width[i], scene.height[i]
+    return (min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h))
@@ -0,0 +1,125 @@
+import re
+from bisect import bisect_right
+
+# === Токены SLC ===
+# IDENT — слово (\w+), "(" ")" "{" "}" — скобки, OP — любая другая пунктуация.
+_TOKEN_RE = re.compile(r"(?P<IDENT>\w+)|(?P<PUNCT>[(){}])|(?P<OP>[^\w\s(){}]+)")
+# Структурные токены: ключевые слова и фигурные скобки, остальное пропускается.
+# Слева слово не ограничивается: прежний разбор регулярными выражениями находил
+# и «склеенные» XCreate/xStyle — результат разбора не должен от этого меняться.
+_STRUCT_RE = re.compile(r"Create|Style|[{}]")
+# Хвост заголовка после 'Create': два слова и '('
+_HEADER_RE = re.compile(r"\s+(\w+)\s+(\w+)\s*\(")
+_OPEN_BRACE_RE = re.compile(r"\s*\{")
+
+# Байтовые варианты для mmap: многобайтовые символы UTF-8 считаем частью слова
+_TOKEN_RE_BYTES = re.compile(
+    rb"(?P<IDENT>[\w\x80-\xff]+)|(?P<PUNCT>[(){}])|(?P<OP>[^\w\s(){}\x80-\xff]+)"
+)
+_STRUCT_RE_BYTES = re.compile(rb"Create|Style|[{}]")
+_HEADER_RE_BYTES = re.compile(rb"\s+([\w\x80-\xff]+)\s+([\w\x80-\xff]+)\s*\(")
+_OPEN_BRACE_RE_BYTES = re.compile(rb"\s*\{")
+_STRUCT_NAMES = {b"Create": "Create", b"Style": "Style", b"{": "{", b"}": "}"}
+
+
+class SLCLexer:
+    """Однопроходный лексер SLC поверх str, bytes или mmap.
+
+    next() возвращает кортеж (kind, value, start, end) или None в конце текста:
+    kind — "IDENT", "OP" или сам символ скобки, value — текст токена (всегда str).
+    Пробелы пропускаются; позицию можно сдвигать вручную (pos) для «сырых» участков.
+    """
+
+    def __init__(self, text, pos: int = 0, end: int = None):
+        self.text = text
+        self.pos = pos
+        self.end = len(text) if end is None else end
+        self.is_bytes = not isinstance(text, str)
+        if self.is_bytes:
+            self._search = _TOKEN_RE_BYTES.search
+            self._search_struct = _STRUCT_RE_BYTES.search
+            self._match_header = _HEADER_RE_BYTES.match
+            self._match_brace = _OPEN_BRACE_RE_BYTES.match
+        else:
+            self._search = _TOKEN_RE.search
+            self._search_struct = _STRUCT_RE.search
+            self._match_header = _HEADER_RE.match
+            self._match_brace = _OPEN_BRACE_RE.match
+
+    def next(self):
+        m = self._search(self.text, self.pos, self.end)
+        if m is None:
+            self.pos = self.end
+            return None
+        self.pos = m.end()
+        value = m.group()
+        if self.is_bytes:
+            value = value.decode("utf-8", "replace")
+        kind = m.lastgroup
+        if kind == "PUNCT":
+            kind = value
+        return kind, value, m.start(), self.pos
+
+    def next_structural(self):
+        """Следующий 'Create', 'Style', '{' или '}' как (value, start); прочие токены пропускаются"""
+        m = self._search_struct(self.text, self.pos, self.end)
+        if m is None:
+            self.pos = self.end
+            return None
+        self.pos = m.end()
+        value = m.group()
+        if self.is_bytes:
+            value = _STRUCT_NAMES[value]
+        return value, m.start()
+
+    def header(self):
+        """После 'Create': (тип, его позиция, имя, его позиция, позиция '(') или None.
+
+        При успехе позиция лексера сдвигается за '('.
+        """
+        m = self._match_header(self.text, self.pos, self.end)
+        if m is None:
+            return None
+        self.pos = m.end()
+        type_, name = m.group(1), m.group(2)
+        if self.is_bytes:
+            type_, name = type_.decode("utf-8", "replace"), name.decode("utf-8", "replace")
+        return type_, m.start(1), name, m.start(2), self.pos - 1
+
+    def open_brace(self, pos: int) -> int:
+        """Позиция после '{', если с pos идут только пробелы и '{', иначе -1"""
+        m = self._match_brace(self.text, pos, self.end)
+        return -1 if m is None else m.end()
+
+    def find(self, char: str, start: int, end: int = None) -> int:
+        """Позиция символа char в [start, end) или -1"""
+        if self.is_bytes:
+            char = char.encode()
+        return self.text.find(char, start, self.end if end is None else end)
+
+    def slice(self, start: int, end: int) -> str:
+        """Сырой участок текста как str"""
+        chunk = self.text[start:end]
+        return chunk.decode("utf-8", "replace") if self.is_bytes else chunk
+
+
+class LineIndex:
+    """Таблица смещений начала строк: позиция → строка/колонка за O(log n)"""
+
+    def __init__(self, text):
+        nl = b"\n" if not isinstance(text, str) else "\n"
+        starts = [0]
+        find = text.find
+        i = find(nl)
+        while i >= 0:
+            starts.append(i + 1)
+            i = find(nl, i + 1)
+        self.starts = starts
+
+    def line(self, index: int) -> int:
+        """Номер строки (с 1) для смещения index"""
+        return bisect_right(self.starts, index)
+
+    def column(self, index: int) -> int:
+        """Номер колонки (с 1) для смещения index"""
+        return index - self.starts[self.line(index) - 1] + 1
@@ -0,0 +1,43 @@
+import re
+
+from PyQt6.QtGui import QTextBlockUserData
+
+LINT_SLICE = 0.02           # секунд проверки за раз: большой файл проверяется порциями
+
+_CREATE_RE = re.compile(r"Create\s+\w+")
+
+
+def lint_line(line: str):
+    """Ошибки одной строки SLC: [(колонка, сообщение)].
+
+    Правила построчные — строка проверяется без оглядки на соседние, поэтому после
+    правки достаточно перепроверить изменённые блоки.
+    """
+    text = line.strip()
+    if not text:
+        return []
+    problems = []
+
+    # Ошибка: нет фигурной скобки
+    if _CREATE_RE.search(text) and not text.endswith("{"):
+        problems.append((len(text), "❌ Ожидается '{' после команды Create"))
+
+    # Ошибка: Style без фигурных скобок
+    if text.startswith("Style") and "{" not in text:
+        problems.append((len(text), "❌ Пропущена '{' после Style"))
+
+    # Ошибка: неизвестная команда
+    if not text.startswith(("Create", "Style", "}", "{", "//")):
+        if ":" not in text and not text.endswith("}"):
+            problems.append((1, f"⚠ Неизвестная инструкция: {text}"))
+
+    return problems
+
+
+class LintData(QTextBlockUserData):
+    """Результат lint_line, запомненный в блоке документа вместе с текстом, для которого он верен"""
+
+    def __init__(self, text: str, problems):
+        super().__init__()
+        self.text = text
+        self.problems = problems
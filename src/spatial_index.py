@@ -0,0 +1,114 @@
+from array import array
+from math import sqrt
+
+# Сколько фигур в среднем приходится на клетку сетки
+_SHAPES_PER_CELL = 16
+# Фигуры крупнее стольких клеток не раскладываются по сетке, а проверяются всегда
+_MAX_CELLS_PER_SHAPE = 64
+_MIN_CELL = 32
+
+
+class GridIndex:
+    """Равномерная сетка над фигурами сцены: какие фигуры пересекают прямоугольник.
+
+    Строится один раз на сцену. query() возвращает индексы по возрастанию —
+    в порядке отрисовки, так что наложение фигур не меняется.
+    """
+
+    def __init__(self, scene, cell: int = None):
+        self.count = len(scene)
+        left, top, right, bottom = array("d"), array("d"), array("d"), array("d")
+        for x, y, w, h in zip(scene.x, scene.y, scene.width, scene.height):
+            x, y = int(x), int(y)       # как при отрисовке (DisplayList)
+            # отрицательная ширина/высота рисуется «в другую сторону»
+            if w >= 0:
+                left.append(x)
+                right.append(x + w)
+            else:
+                left.append(x + w)
+                right.append(x)
+            if h >= 0:
+                top.append(y)
+                bottom.append(y + h)
+            else:
+                top.append(y + h)
+                bottom.append(y)
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+
+        if self.count:
+            self.bounds = (min(left), min(top), max(right), max(bottom))
+        else:
+            self.bounds = (0.0, 0.0, 0.0, 0.0)
+        if cell is None:
+            area = (self.bounds[2] - self.bounds[0]) * (self.bounds[3] - self.bounds[1])
+            cell = sqrt(area * _SHAPES_PER_CELL / self.count) if self.count else _MIN_CELL
+        self.cell = max(_MIN_CELL, int(cell))
+
+        self.cells = {}                 # (колонка, строка) → список индексов фигур
+        self.large = []                 # фигуры на слишком много клеток
+        size = self.cell
+        cells = self.cells
+        for i, (l, t, r, b) in enumerate(zip(left, top, right, bottom)):
+            c0, c1 = int(l // size), int(r // size)
+            r0, r1 = int(t // size), int(b // size)
+            if c0 == c1 and r0 == r1:
+                key = (c0, r0)
+                bucket = cells.get(key)
+                if bucket is None:
+                    cells[key] = [i]
+                else:
+                    bucket.append(i)
+                continue
+            if (c1 - c0 + 1) * (r1 - r0 + 1) > _MAX_CELLS_PER_SHAPE:
+                self.large.append(i)
+                continue
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    bucket = cells.get((col, row))
+                    if bucket is None:
+                        cells[(col, row)] = [i]
+                    else:
+                        bucket.append(i)
+
+    def query(self, left: float, top: float, right: float, bottom: float):
+        """Индексы фигур, пересекающих прямоугольник [left, right] × [top, bottom], по порядку"""
+        b_left, b_top, b_right, b_bottom = self.bounds
+        if left <= b_left and top <= b_top and right >= b_right and bottom >= b_bottom:
+            return range(self.count)
+        if right < b_left or left > b_right or bottom < b_top or top > b_bottom:
+            return []
+
+        size = self.cell
+        c0, c1 = int(max(left, b_left) // size), int(min(right, b_right) // size)
+        r0, r1 = int(max(top, b_top) // size), int(min(bottom, b_bottom) // size)
+        found = set(self.large)
+        cells = self.cells
+        if (c1 - c0 + 1) * (r1 - r0 + 1) <= len(cells):
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    bucket = cells.get((col, row))
+                    if bucket is not None:
+                        found.update(bucket)
+        else:
+            # прямоугольник больше, чем занято клеток: дешевле пройти по самим клеткам
+            for (col, row), bucket in cells.items():
+                if c0 <= col <= c1 and r0 <= row <= r1:
+                    found.update(bucket)
+
+        s_left, s_top, s_right, s_bottom = self.left, self.top, self.right, self.bottom
+        return sorted(
+            i for i in found
+            if s_left[i] <= right and s_right[i] >= left and s_top[i] <= bottom and s_bottom[i] >= top
+        )
+
+    def at(self, x: float, y: float):
+        """Индексы фигур, чьи габариты [left, right) × [top, bottom) содержат точку, по возрастанию"""
+        size = self.cell
+        candidates = self.cells.get((int(x // size), int(y // size)), [])
+        if self.large:
+            candidates = candidates + self.large
+        s_left, s_top, s_right, s_bottom = self.left, self.top, self.right, self.bottom
+        return sorted(
+            i for i in candidates
+            if s_left[i] <= x < s_right[i] and s_top[i] <= y < s_bottom[i]
+        )
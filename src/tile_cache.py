@@ -0,0 +1,55 @@
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TileCache:
+    """LRU-кэш готовых плиток (QImage) с ограничением по памяти.
+
+    Ключ — (уровень масштаба, колонка, строка). Размер плитки считается как
+    ширина × высота × 4 байта; при переполнении вытесняются плитки, которые
+    дольше всех не показывались.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._tiles = OrderedDict()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def __contains__(self, key):
+        return key in self._tiles
+
+    def get(self, key):
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        old = self._tiles.pop(key, None)
+        if old is not None:
+            self.bytes -= self._size(old)
+        self._tiles[key] = tile
+        self.bytes += self._size(tile)
+        while self.bytes > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self.bytes -= self._size(evicted)
+
+    def keys(self):
+        return list(self._tiles)
+
+    def discard(self, key):
+        tile = self._tiles.pop(key, None)
+        if tile is not None:
+            self.bytes -= self._size(tile)
+
+    def clear(self):
+        self._tiles.clear()
+        self.bytes = 0
+
+    @staticmethod
+    def _size(tile) -> int:
+        return tile.width() * tile.height() * 4
@@ -0,0 +1,59 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Запущенные задачи: ссылки держим, пока задача не закончится (отпускаем уже в потоке
+# GUI), даже если владелец — холст, превью — закрыт раньше
+_running = set()
+
+
+def _forget(job):
+    _running.discard(job)
+
+
+class _JobSignals(QObject):
+    done = pyqtSignal(object, object)       # ключ задачи, результат
+    failed = pyqtSignal(object, object)     # ключ задачи, исключение
+    finished = pyqtSignal(object)           # сама задача — после done/failed или отмены
+
+
+class Job(QRunnable):
+    """Функция fn(*args), выполняемая в пуле потоков.
+
+    Результат приходит сигналом signals.done(key, результат), исключение —
+    signals.failed(key, исключение); оба доставляются в поток GUI. cancel() снимает
+    задачу из очереди, а у уже начатой подавляет сигнал: fn должна только читать
+    данные, которые ей передали, и не трогать виджеты.
+    """
+
+    def __init__(self, key, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+        self.signals = _JobSignals()
+        self.signals.finished.connect(_forget)
+
+    def start(self):
+        _running.add(self)
+        QThreadPool.globalInstance().start(self)
+
+    def cancel(self):
+        self.cancelled = True
+        if QThreadPool.globalInstance().tryTake(self):
+            _running.discard(self)
+
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            try:
+                result = self.fn(*self.args)
+            except Exception as e:
+                if not self.cancelled:
+                    self.signals.failed.emit(self.key, e)
+                return
+            if not self.cancelled:
+                self.signals.done.emit(self.key, result)
+        finally:
+            self.signals.finished.emit(self)
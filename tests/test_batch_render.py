@@ -0,0 +1,25 @@
+"""Размер картинки рендера без GUI."""
+from src.batch_render import MIN_SIZE, scene_size
+from src.scene import Scene
+
+
+def shape(x, y, width, height):
+    return {"type": "Square", "name": f"S{x}_{y}", "params": {"x": x, "y": y},
+            "style": {"width": str(width), "height": str(height)}}
+
+
+def test_scene_size_counts_negative_sizes_by_their_extent():
+    # отрицательный размер рисуется влево/вверх от (x, y): дальний край — сам x или y
+    scene = Scene.from_objects([shape(900, 10, -100, 20), shape(10, 700, 20, -50)])
+    assert scene_size(scene) == (900, 700)
+    assert scene_size(scene, 2.0) == (1800, 1400)
+
+
+def test_scene_size_is_at_least_preview_size():
+    scene = Scene.from_objects([shape(10, 10, 20, 20), shape(-500, -500, -40, -40)])
+    assert scene_size(scene) == (MIN_SIZE, MIN_SIZE)
+
+
+def test_scene_size_uses_drawn_coordinates():
+    scene = Scene.from_objects([shape(500.9, 600.9, 10, 10)])
+    assert scene_size(scene) == (510, 610)
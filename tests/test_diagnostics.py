@@ -0,0 +1,37 @@
+"""DiagnosticStore: правка текста сдвигает диагностики вместе со строками."""
+from src.diagnostics import DiagnosticStore
+
+
+def make_store():
+    store = DiagnosticStore()
+    store.extend((line, 1, 1, f"E{line}") for line in (3, 5, 6, 7))
+    return store
+
+
+def lines(store):
+    return [(line, msg) for line, _, _, msg in store]
+
+
+def test_enter_at_line_start_moves_diagnostic_down():
+    store = make_store()
+    store.apply_edit(3, 0, 0, 1)
+    assert lines(store) == [(4, "E3"), (6, "E5"), (7, "E6"), (8, "E7")]
+
+
+def test_enter_after_diagnostic_keeps_it():
+    store = make_store()
+    store.apply_edit(3, 2, 0, 1)
+    assert lines(store) == [(3, "E3"), (6, "E5"), (7, "E6"), (8, "E7")]
+
+
+def test_deleting_whole_lines_drops_their_diagnostics():
+    """Удаление строк 5–6 с начала строки 5: их диагностики пропадают, строка 7 становится 5-й"""
+    store = make_store()
+    store.apply_edit(5, 0, 2, 0)
+    assert lines(store) == [(3, "E3"), (5, "E7")]
+
+
+def test_deleting_from_mid_line():
+    store = make_store()
+    store.apply_edit(4, 3, 2, 0)
+    assert lines(store) == [(3, "E3"), (4, "E6"), (5, "E7")]
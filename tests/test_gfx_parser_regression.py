@@ -0,0 +1,125 @@
+"""Регрессия разбора SLC: GFXParser на лексере выдаёт то же, что исходный на регулярных выражениях.
+
+Сравнивается исход parse() целиком: список объектов или текст SyntaxError
+(включая номера строк). Эталон — tests/baseline_gfx_parser.py.
+"""
+import contextlib
+import io
+import random
+
+import pytest
+
+from src.gfx_parser import GFXParser, iter_shapes
+from tests.baseline_gfx_parser import GFXParser as BaselineParser
+
+SCENE = """Create List Scene() {
+    Create Square A(x:1, y:2) {
+        Style { color: red; width: 10; }
+    }
+    Create Circle B(x:-3.5, label:"b") {
+        Style { color: #00ff00; }
+    }
+}
+"""
+
+# === Корпус: имя случая → текст ===
+CORPUS = {
+    "scene": SCENE,
+    "empty": "   \n",
+    "no_list": "Create Square A(x:1) {\n Style { color: red; }\n}\n",
+    "lowercase_list": SCENE.replace("List Scene", "List scene"),
+    "list_with_params": SCENE.replace("Scene()", "Scene(x:1)"),
+    "no_shapes": "Create List Scene() {\n}\n",
+    "no_style": "Create List Scene() {\n Create Square A(x:1) {\n }\n}\n",
+    "shape_named_list": SCENE.replace("Circle B", "Circle List"),
+    "lowercase_shape": SCENE.replace("Circle B", "Circle b"),
+    "bad_param": SCENE.replace("x:1,", "x 1,"),
+    "bad_value": SCENE.replace("x:1,", "x:one,"),
+    "duplicate_name": SCENE.replace("Circle B", "Circle A"),
+    "duplicate_name_far": SCENE.replace("Circle B", "Circle A").replace("\n", "\n\n"),
+    "header_on_two_lines": SCENE.replace("y:2) {", "y:2)\n    {"),
+    "paren_in_params": SCENE.replace('label:"b"', 'label:"(b)"'),
+    "style_shared": "Create List Scene() {\n Create Square A(x:1) {\n }\n Create Square B(x:2) {\n"
+                    "  Style { color: blue; }\n }\n}\n",
+    # склеенные токены: прежние регулярные выражения не ограничивали слово слева
+    "glued_create": SCENE.replace("Create Circle", "XCreate Circle"),
+    "glued_list": SCENE.replace("Create List", "xCreate List"),
+    "glued_style": SCENE.replace("Style { color: red", "xStyle { color: red"),
+    "glued_create_twice": SCENE.replace("Create Circle", "CreateCreate Circle"),
+    "glued_right": SCENE.replace("Create Circle", "Createx Circle").replace("Style { color: #", "Stylex { color: #"),
+    "glued_duplicate": SCENE.replace("Create Circle B", "myCreate Circle A"),
+    # тело Style — текст до первой '}': Create и Style внутри него всё равно видны
+    "style_before_list": "Style { color: red;\n" + SCENE,
+    "style_swallows_shape": SCENE.replace("Style { color: red; width: 10; }",
+                                          "Style { color: red;\n    Create Square C(x:5) {\n Style { a: b; }"),
+    "style_in_style": "Create List Scene() {\n Create Square A(x:1) {\n  Style { Style { color: red; }\n }\n}\n",
+    "braces_in_style": SCENE.replace("Style { color: red;", "Style { color: {red;"),
+    # Style и Create List внутри скобок заголовка фигуры
+    "style_in_params": SCENE.replace('label:"b"', 'label:"Style { color: blue; }"'),
+    "list_in_params": SCENE.replace("Create List Scene() {\n", "").replace(
+        'label:"b"', 'label:"Create List Scene() {"'),
+    "unclosed_style": "Create List Scene() {\n Create Square A(x:1) {\n  Style { color: red;\n",
+}
+
+# Куски для случайных текстов: ключевые слова, склейки, заголовки, скобки
+PIECES = [
+    "Create", "XCreate", "Createx", "Style", "xStyle", "Stylex", "List", "Scene", "scene", "Square", "A", "B", "a",
+    "(", ")", "()", "{", "}", "x:1", ",", "y:'s'", ":", ";", "color: red", "w:-2.5", " ", " ", "\n", "\n", "ж",
+    "Create List Scene() {", "Create Square A(x:1, y:2) {", "Create Circle B() {", "Style { color: red; }",
+    "Style {", "xStyle{fill:blue}", "XCreate Square C(x:3) {", '"Style {"', "s:'Create List Scene() {'",
+]
+
+
+def outcome(parser_cls, code: str, filename: str = None):
+    """("ok", объекты) или ("error", текст SyntaxError)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            return "ok", parser_cls(code, filename).parse()
+        except SyntaxError as e:
+            return "error", str(e)
+
+
+def random_code(rng: random.Random) -> str:
+    return "".join(rng.choice(PIECES) + " " * (rng.random() < 0.3) for _ in range(rng.randrange(1, 40)))
+
+
+@pytest.mark.parametrize("filename", [None, "Scene.slc", "Other.slc"])
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_corpus_matches_baseline(name, filename):
+    code = CORPUS[name]
+    assert outcome(GFXParser, code, filename) == outcome(BaselineParser, code, filename)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_texts_match_baseline(seed):
+    rng = random.Random(seed)
+    for _ in range(1500):
+        code = random_code(rng)
+        filename = rng.choice([None, "Scene.slc"])
+        assert outcome(GFXParser, code, filename) == outcome(BaselineParser, code, filename), code
+
+
+def test_diagnostics_mode_keeps_objects():
+    """parse_with_diagnostics на тексте без ошибок разбора собирает те же объекты.
+
+    Диагностик может быть больше нуля: режим восстановления сообщает и о заголовках,
+    которые parse() молча пропускает (например, Create с именем с маленькой буквы).
+    """
+    for name, code in CORPUS.items():
+        result = outcome(BaselineParser, code)
+        if result[0] != "ok":
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            objects, _ = GFXParser(code).parse_with_diagnostics()
+        assert objects == result[1], name
+
+
+def test_iter_shapes_matches_parse(tmp_path):
+    path = tmp_path / "Scene.slc"
+    for name, code in CORPUS.items():
+        result = outcome(BaselineParser, code, "Scene.slc")
+        if result[0] != "ok":
+            continue
+        path.write_text(code, encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert list(iter_shapes(str(path), "Scene.slc")) == result[1], name
@@ -0,0 +1,40 @@
+"""LodScene: плитки с сеткой build_point_grid и без неё совпадают."""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.lod import LodScene
+from src.scene import Scene
+
+
+def make_scene(n: int, span: int, seed: int) -> Scene:
+    rnd = random.Random(seed)
+    return Scene.from_objects(
+        {
+            "type": rnd.choice(("Square", "Circle", "Triangle")),
+            "name": f"S{i}",
+            "params": {"x": rnd.randint(-span, span) + rnd.random(), "y": rnd.randint(-span, span)},
+            "style": {"color": rnd.choice(("red", "blue", "#80ff0000")),
+                      "width": str(rnd.choice((rnd.randint(-40, 40), rnd.randint(-3000, 3000)))),
+                      "height": str(rnd.randint(-40, 40))},
+        }
+        for i in range(n)
+    )
+
+
+def test_tile_with_point_grid_matches_full_scan():
+    scene = make_scene(5000, 4000, seed=1)
+    args = ([True, True, False], [0xffff0000, 0xff0000ff, 0xff800000], 0xff1e1e1e)
+    scan, grid = LodScene(scene, *args), LodScene(scene, *args)
+    grid.build_point_grid()
+    rnd = random.Random(2)
+    for _ in range(200):
+        zoom = 2 ** rnd.uniform(-5, 3)
+        extent = 8000 * zoom
+        left = int(rnd.uniform(-extent, extent)) // 256 * 256
+        top = int(rnd.uniform(-extent, extent)) // 256 * 256
+        raster_a, exact_a = scan.tile(zoom, left, top, 256)
+        raster_b, exact_b = grid.tile(zoom, left, top, 256)
+        assert np.array_equal(raster_a, raster_b) and np.array_equal(exact_a, exact_b), (zoom, left, top)
@@ -0,0 +1,44 @@
+"""SLCParseTree: инкрементальное обновление даёт то же, что полный разбор."""
+import contextlib
+import io
+
+import pytest
+
+from src.gfx_parser import GFXParser
+from src.parse_tree import SLCParseTree
+
+
+class Doc:
+    """Текст документа для дерева разбора (только BMP, позиции совпадают со str)"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tree = SLCParseTree(lambda start, end: self.text[start:end], lambda: len(self.text))
+        objects(self.tree)
+
+    def replace(self, position: int, removed: int, new: str):
+        self.text = self.text[:position] + new + self.text[position + removed:]
+        self.tree.apply_edit(position, removed, len(new))
+
+
+def objects(source):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return source.objects() if isinstance(source, SLCParseTree) else GFXParser(source).parse()
+
+
+def test_edit_inside_shape_is_incremental():
+    doc = Doc("Create List Scene() {\n}\nCreate Square A(x:1) {\n    Style { color: red; }\n}\n")
+    doc.replace(doc.text.index("x:1") + 2, 1, "25")
+    assert not doc.tree.dirty
+    assert objects(doc.tree) == objects(doc.text)
+
+
+def test_edit_in_list_header_reparses_everything():
+    """Единственный блок — сам 'Create List': переименование List делает текст ошибочным"""
+    doc = Doc("Create List Scene() {\n    Style { color: red; }\n}\n")
+    doc.replace(doc.text.index("List") + 3, 1, "S2")
+    assert doc.tree.dirty
+    with pytest.raises(SyntaxError):
+        objects(doc.text)
+    with pytest.raises(SyntaxError):
+        objects(doc.tree)
@@ -0,0 +1,21 @@
+"""Scene: столбцы и двоичный формат не теряют данных на больших сценах."""
+from src.scene import Scene
+
+
+def test_many_types_and_layouts_round_trip(tmp_path):
+    """Больше 65535 разных типов и макетов: id не переполняют столбцы kind и layout"""
+    n = 70000
+    objects = [
+        {"type": f"T{i}", "name": f"S{i}", "params": {f"p{i}": 1}, "style": {"color": "red"}}
+        for i in range(n)
+    ]
+    scene = Scene.from_objects(objects)
+    assert len(scene.types) == len(scene.layouts) == n
+    assert scene[n - 1] == objects[n - 1]
+
+    path = tmp_path / "big.slcc"
+    scene.save(str(path))
+    loaded = Scene.load(str(path))
+    assert [loaded.type_name(i) for i in (0, 65535, 65536, n - 1)] == ["T0", "T65535", "T65536", f"T{n - 1}"]
+    assert loaded[65536] == objects[65536]
+    assert Scene.from_bytes(scene.to_bytes()).to_objects() == objects
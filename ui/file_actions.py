@@ -1,11 +1,20 @@
 import os
-from PyQt6.QtWidgets import QFileDialog, QMessageBox, QDialog, QVBoxLayout, QLabel, QPushButton, QComboBox, QInputDialog
-from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import (QFileDialog, QMessageBox, QDialog, QVBoxLayout, QLabel, QPushButton, QComboBox,
+                             QInputDialog, QDockWidget)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QTextCursor
 from src.gfx_parser import GFXParser
+from src.large_file import LARGE_FILE_BYTES, ChunkedLoader, read_chunks
+from src.mapped_view import MappedFileView
+from src.scene import COMPILED_EXT
+from src.workers import Job
 
 class FileActions:
     def __init__(self, main):
         self.main = main
+        self.large_file_bytes = LARGE_FILE_BYTES    # файлы от этого размера грузятся по частям
+        self._load_job = None           # чтение большого файла в пуле потоков
+        self._loader = None             # ChunkedLoader: вставка прочитанного в редактор
 
     def open_folder_dialog(self):
         path = QFileDialog.getExistingDirectory(self.main, "Выберите папку проекта")
@@ -70,10 +79,23 @@ class FileActions:
         self.main.file_tree.load_folder(root)
 
     def open_file_in_editor(self, path):
+        self.cancel_loading()
+        # .slcc — двоичная сцена: в редактор не грузим, сразу показываем превью.
+        # Прежний текст из редактора убирается: Ctrl+S не должен писать его поверх .slcc
+        if path.endswith(COMPILED_EXT):
+            self._release_editor()
+            self.main.setWindowTitle(f"SLC IDE — {os.path.basename(path)}")
+            self.main.run_actions.run_compiled(path)
+            return
         try:
+            if os.path.getsize(path) >= self.large_file_bytes:
+                self.open_large_file(path)
+                return
             with open(path, "r", encoding="utf-8") as f:
                 text = f.read()
 
+            # старая подсветка перекрасила бы весь новый текст при вставке
+            self.main.editor.clear_highlighter(keep_formats=True)
             self.main.editor.blockSignals(True)
             self.main.editor.setPlainText(text)
             self.main.editor.blockSignals(False)
@@ -83,9 +105,8 @@ class FileActions:
             ext = os.path.splitext(path)[1]
             self.main.editor.set_language(ext)
 
-        # Проверим синтаксис сразу (только для .py)
-            if ext == ".py":
-                self.main.run_actions.run_syntax_check()
+            # Проверим синтаксис сразу
+            self.main.run_actions.run_syntax_check()
 
             self.main.setWindowTitle(f"SLC IDE — {os.path.basename(path)}")
 
@@ -93,10 +114,96 @@ class FileActions:
             QMessageBox.critical(self.main, "Ошибка", f"Не удалось открыть файл:\n{e}")
 
 
+    # ======= Большие файлы =======
+    def open_large_file(self, path):
+        """Файл от large_file_bytes: чтение в пуле потоков, вставка кусками с прогрессом.
+
+        Подсветка, проверка и current_file (а с ним и сохранение) — только когда текст
+        загружен целиком.
+        """
+        self._release_editor()
+        name = os.path.basename(path)
+        self.main.problems.setPlainText(f"⏳ Чтение {name} ({os.path.getsize(path) / 2 ** 20:.0f} МБ)…")
+
+        job = Job(path, read_chunks, path)
+        job.signals.done.connect(self._large_file_read)
+        job.signals.failed.connect(self._large_file_failed)
+        self._load_job = job
+        job.start()
+
+    def _release_editor(self):
+        """Пустой редактор только для чтения, без языка и без current_file — сохранять нечего"""
+        editor = self.main.editor
+        editor.clear_highlighter(keep_formats=True)
+        editor.set_language("")
+        editor.blockSignals(True)
+        editor.setPlainText("")
+        editor.blockSignals(False)
+        editor.setReadOnly(True)
+        self.main.current_file = None
+
+    def _large_file_read(self, path, result):
+        if self._load_job is None or self._load_job.key != path:
+            return                      # загрузку уже отменило открытие другого файла
+        self._load_job = None
+        name = os.path.basename(path)
+        chunks, lines = result
+        loader = ChunkedLoader(self.main.editor, chunks, lines)
+        loader.progress.connect(lambda percent: self.main.problems.setPlainText(f"⏳ Загрузка {name}: {percent}%"))
+        loader.finished.connect(lambda: self._large_file_loaded(path))
+        self._loader = loader
+
+    def _large_file_loaded(self, path):
+        self._loader = None
+        editor = self.main.editor
+        self.main.current_file = path
+        editor.moveCursor(QTextCursor.MoveOperation.Start)
+        editor.set_language(os.path.splitext(path)[1])
+        self.main.run_actions.run_syntax_check()
+        self.main.setWindowTitle(f"SLC IDE — {os.path.basename(path)}")
+        print(f"📂 Загружен {os.path.basename(path)}: {editor.blockCount()} строк")
+
+    def _large_file_failed(self, path, error):
+        if self._load_job is not None and self._load_job.key == path:
+            self._load_job = None
+            self.main.editor.setReadOnly(False)
+            self.main.problems.clear()
+            QMessageBox.critical(self.main, "Ошибка", f"Не удалось открыть файл:\n{error}")
+
+    def cancel_loading(self):
+        """Прерывает загрузку большого файла, если она идёт"""
+        if self._load_job is not None:
+            self._load_job.cancel()
+            self._load_job = None
+        if self._loader is not None:
+            self._loader.cancel()
+            self._loader = None
+
+    def open_mapped_view(self, path=None):
+        """Большой файл только для чтения: панель MappedFileView, текст не грузится в редактор"""
+        if not path:
+            path, _ = QFileDialog.getOpenFileName(self.main, "Просмотр файла", self.main.file_tree.root_path or "")
+            if not path:
+                return
+        try:
+            view = MappedFileView(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self.main, "Ошибка", f"Не удалось открыть файл:\n{e}")
+            return
+        dock = QDockWidget(f"📜 {os.path.basename(path)} (только чтение)", self.main)
+        dock.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dock.destroyed.connect(lambda: view.close_file())
+        dock.setWidget(view)
+        self.main.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+
     def save_file(self):
         if not self.main.current_file:
             QMessageBox.warning(self.main, "Нет файла", "Сначала открой файл!")
             return
+        if self.main.current_file.endswith(COMPILED_EXT):
+            # двоичная сцена: текст редактора поверх неё уничтожил бы файл
+            QMessageBox.warning(self.main, "Нельзя сохранить", "Файл .slcc только для чтения — он собирается из .slc.")
+            return
         with open(self.main.current_file, "w", encoding="utf-8") as f:
             f.write(self.main.editor.toPlainText())
         self.main.problems.setPlainText("💾 Saved OK")
@@ -12,6 +12,9 @@ from ui.menu_actions import create_menu
 from ui.file_actions import FileActions
 from ui.run_actions import RunActions
 
+LINT_DELAY = 500        # мс паузы в наборе до проверки всего текста
+SLC_LINT_DELAY = 0      # SLC проверяются только изменённые блоки — ждать незачем
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -55,11 +58,21 @@ class MainWindow(QMainWindow):
         # --- Меню
         create_menu(self)
 
-        # --- Таймер проверки
+        # --- Таймер проверки: SLC проверяется по изменённым блокам — почти без задержки,
+        # остальное — целым текстом после паузы в наборе
         self.lint_timer = QTimer(self)
         self.lint_timer.setSingleShot(True)
-        self.lint_timer.setInterval(500)
         self.lint_timer.timeout.connect(self.run_actions.run_syntax_check)
-        self.editor.textChanged.connect(lambda: self.lint_timer.start())
+        self.editor.textChanged.connect(self.on_text_changed)
 
         self.current_file = None
+
+    def on_text_changed(self):
+        if self.editor.current_language == "SLC":
+            self.lint_timer.start(SLC_LINT_DELAY)
+        else:
+            self.lint_timer.start(LINT_DELAY)
+
+    def closeEvent(self, event):
+        self.run_actions.python_linter.shutdown()
+        super().closeEvent(event)
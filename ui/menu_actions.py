@@ -16,6 +16,10 @@ def create_menu(window):
     new_folder_action.setShortcut("Ctrl+Shift+N")
     new_folder_action.triggered.connect(lambda: window.file_actions.create_item(is_folder=True))
 
+    view_action = QAction("Просмотр большого файла…", window)
+    view_action.setShortcut("Ctrl+Shift+O")
+    view_action.triggered.connect(lambda: window.file_actions.open_mapped_view())
+
     save_action = QAction("Сохранить", window)
     save_action.setShortcut("Ctrl+S")
     save_action.triggered.connect(window.file_actions.save_file)
@@ -33,7 +37,7 @@ def create_menu(window):
     run_action.triggered.connect(window.run_actions.run_current_file)
 
     file_menu.addActions([
-        open_action, new_file_action, new_folder_action, save_action, export_action
+        open_action, view_action, new_file_action, new_folder_action, save_action, export_action
     ])
     file_menu.addSeparator()
     file_menu.addAction(exit_action)
@@ -1,11 +1,55 @@
+import os
+import re
 import subprocess
-from PyQt6.QtWidgets import QMessageBox, QDialog, QVBoxLayout
-from src.gfx_parser import GFXParser
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QMessageBox, QDockWidget
 from src.gfx_canvas import GFXCanvas
+from src.gfx_parser import GFXParser
+from src.parse_cache import ParseCache
+from src.parse_tree import SLCParseTree
+from src.scene import COMPILED_EXT, Scene
+from src.python_lint import PythonLinter
+from src.slc_lint import LINT_SLICE
+from src.workers import Job
+
+
+def load_slc(text: str, cache: ParseCache):
+    """Сцена из текста SLC (выполняется в пуле потоков):
+    (Scene, диагностики или None, TreeState для дерева разбора редактора или None).
+
+    Сначала ищем готовую Scene в кэше разбора — тогда дерево не строится; при ошибке
+    в коде — разбор с восстановлением: в превью попадают фигуры без ошибок.
+    """
+    key = cache.key(text)
+    scene = cache.load(key)
+    if scene is not None:
+        print(f"⚡ Сцена из кэша: {len(scene)} фигур")
+        return scene, None, None
+    state = SLCParseTree.build(text)
+    if state.error is not None:
+        parser = GFXParser(text)
+        objects, diagnostics = parser.parse_with_diagnostics()
+        scene = Scene.from_objects(objects)
+        scene.spans = parser.spans
+        return scene, diagnostics, state
+    scene = Scene.from_objects(state.objects)
+    cache.store(key, scene)
+    scene.spans = state.spans
+    return scene, None, state
+
 
 class RunActions:
     def __init__(self, main):
         self.main = main
+        self.preview = None             # QDockWidget с GFXCanvas, создаётся при первом запуске
+        self._parse_job = None          # Job разбора текущего запуска
+        self._parse_runs = 0
+        self._parse_source = None       # (дерево разбора, ревизия документа, текст) текущего запуска
+        # проверка Python — в отдельном процессе; (ключ текста, ревизия документа) последнего запроса
+        self.python_linter = PythonLinter(main)
+        self.python_linter.finished.connect(self._python_checked)
+        self.python_linter.failed.connect(self._python_failed)
+        self._python_check = None
 
     def run_current_file(self):
         path = self.main.current_file
@@ -16,8 +60,10 @@ class RunActions:
             self.run_python()
         elif path.endswith(".slc"):
             self.run_slc()
+        elif path.endswith(COMPILED_EXT):
+            self.run_compiled(path)
         else:
-            QMessageBox.warning(self.main, "Ошибка", "Можно запускать только .py и .slc файлы")
+            QMessageBox.warning(self.main, "Ошибка", "Можно запускать только .py, .slc и .slcc файлы")
 
     def run_python(self):
         self.main.save_file()
@@ -33,27 +79,166 @@ class RunActions:
             self.main.problems.setPlainText(f"Ошибка: {e}")
 
     def run_slc(self):
-        code = self.main.editor.toPlainText()
+        """Разбор и отрисовка идут в пуле потоков; повторный запуск отменяет незаконченный"""
+        if self._parse_job is not None:
+            self._parse_job.cancel()
+            self._parse_job = None
+        editor = self.main.editor
+        tree = editor.parse_tree
         try:
-            parser = GFXParser(code)
-            objects = parser.parse()
-            dialog = QDialog(self.main)
-            dialog.setWindowTitle("🧱 SLC Preview")
-            layout = QVBoxLayout(dialog)
-            canvas = GFXCanvas(objects)
-            layout.addWidget(canvas)
-            self.main.last_canvas = canvas
-            dialog.show()
+            if tree is not None and not tree.dirty:
+                # дерево уже разобрано инкрементально — объекты готовы
+                self.show_preview(editor.parse_scene())
+                return
+        except SyntaxError:
+            pass
+        except Exception as e:
+            self.main.problems.setPlainText(f"⚠️ Ошибка: {e}")
+            return
+        self._parse_runs += 1
+        text = editor.toPlainText()
+        self._parse_source = (tree, editor.document().revision(), text)
+        job = Job(self._parse_runs, load_slc, text, self.parse_cache())
+        job.signals.done.connect(self._slc_loaded)
+        job.signals.failed.connect(self._slc_failed)
+        self._parse_job = job
+        job.start()
+        self.main.problems.setPlainText("⏳ Разбор сцены…")
+
+    def _slc_loaded(self, run, result):
+        if self._parse_job is None or self._parse_job.key != run:
+            return                      # запуск уже отменён следующим
+        self._parse_job = None
+        objects, diagnostics, state = result
+        if state is not None:
+            self._adopt_tree(self._parse_source, state)
+        elif self._parse_source[0] is not None:
+            # сцена из кэша: дерево для инкрементального разбора строим в фоне
+            job = Job(self._parse_source, SLCParseTree.build, self._parse_source[2])
+            job.signals.done.connect(self._adopt_tree)
+            job.start()
+        self._parse_source = None
+        if diagnostics is None:
+            self.main.editor.clear_diagnostics("parse")
+            self.show_problems_summary()
+        else:
+            self.show_slc_diagnostics(diagnostics)
+        self.show_preview(objects)
+
+    def _adopt_tree(self, source, state):
+        """Дерево разбора редактора принимает полный разбор из пула потоков, если текст
+        с тех пор не менялся — иначе остаётся грязным и разберётся при следующем запуске"""
+        tree, revision, _ = source
+        editor = self.main.editor
+        if tree is not None and tree is editor.parse_tree and tree.dirty \
+                and editor.document().revision() == revision:
+            tree.adopt(state)
+
+    def _slc_failed(self, run, error):
+        if self._parse_job is not None and self._parse_job.key == run:
+            self._parse_job = None
+            self.main.problems.setPlainText(f"⚠️ Ошибка: {error}")
+
+    def run_compiled(self, path):
+        """Превью скомпилированной сцены .slcc: файл отображается в память, без разбора"""
+        try:
+            scene = Scene.load(path)
+            self.main.problems.setPlainText(f"📦 {os.path.basename(path)}: {len(scene)} фигур")
+            self.show_preview(scene)
         except Exception as e:
             self.main.problems.setPlainText(f"⚠️ Ошибка: {e}")
 
+    def show_preview(self, objects):
+        """Сцена в панели превью. Панель одна на окно: следующий запуск только обновляет
+        её сцену, и перерисовываются лишь изменившиеся фигуры"""
+        if self.preview is None:
+            self.preview = QDockWidget("🧱 SLC Preview", self.main)
+            self.preview.setObjectName("slc_preview")
+            canvas = GFXCanvas(objects)
+            canvas.shapeActivated.connect(self.jump_to_shape)
+            self.preview.setWidget(canvas)
+            self.main.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.preview)
+            self.main.last_canvas = self.preview.widget()
+        else:
+            self.preview.widget().update_scene(objects)
+        self.preview.show()
+        self.preview.raise_()
+
+    def jump_to_shape(self, index: int):
+        """Щелчок по фигуре в превью: выделить её имя в строке `Create <Type> <Name>(...)`"""
+        scene = self.main.last_canvas.scene
+        name, type_ = scene.name(index), scene.type_name(index)
+        text = self.main.editor.toPlainText()
+        header = re.compile(rf"Create\s+{re.escape(type_)}\s+({re.escape(name)})\s*\(")
+        # запомненное место из разбора, если текст там не менялся; иначе — поиск по тексту
+        match = None
+        if scene.spans is not None:
+            match = header.match(text, scene.spans[index][0])
+        if match is None:
+            match = header.search(text)
+        if match is None:
+            self.main.problems.setPlainText(f"⚠️ Фигура {name} не найдена в тексте")
+            return
+        self.main.editor.select_text(match.start(1), match.end(1))
+
+    def show_slc_diagnostics(self, diagnostics):
+        """Все ошибки разбора с восстановлением — в редактор; в панель проблем — они
+        вместе с найденными проверкой строк"""
+        editor = self.main.editor
+        editor.clear_diagnostics("parse")
+        editor.show_diagnostics(diagnostics, "parse")
+        self.main.problems.setPlainText(
+            "\n".join(f"✖ {line}:{col} {msg}" for line, col, _, msg in editor.diagnostics)
+        )
+
+    def parse_cache(self):
+        """Кэш разбора в корне проекта (или рядом с файлом, если проект не открыт)"""
+        root = self.main.file_tree.root_path or os.path.dirname(self.main.current_file)
+        return ParseCache(root)
+
     def run_syntax_check(self):
-        if getattr(self.main.editor, "current_language", None) != "Python":
+        editor = self.main.editor
+        if getattr(editor, "current_language", None) == "SLC":
+            self.run_slc_lint()
+            return
+        if getattr(editor, "current_language", None) != "Python":
+            self._python_check = None
             self.main.problems.clear()
             return
-        code = self.main.editor.toPlainText()
-        ok, msg, line, col = self.main.editor.check_syntax(code)
-        if ok:
-            self.main.problems.setPlainText("✔ Syntax OK")
+        key, diagnostics = self.python_linter.check(editor.toPlainText())
+        self._python_check = (key, editor.document().revision())
+        if diagnostics is None:
+            self.main.problems.setPlainText("⏳ Проверка…")
         else:
-            self.main.problems.setPlainText(f"✖ {msg} (строка {line}, символ {col})")
+            self._python_checked(key, diagnostics)
+
+    def _python_checked(self, key, diagnostics):
+        editor = self.main.editor
+        # ответ на устаревший запрос или текст уже правили — ждём следующей проверки
+        if self._python_check != (key, editor.document().revision()):
+            return
+        editor.clear_diagnostics("python")
+        editor.show_diagnostics(diagnostics, "python")
+        self.show_problems_summary()
+
+    def _python_failed(self, key, error):
+        if self._python_check is not None and self._python_check[0] == key:
+            self.main.problems.setPlainText(f"⚠️ Ошибка проверки: {error}")
+
+    def run_slc_lint(self):
+        """Проверка изменённых блоков SLC; большой файл — порциями LINT_SLICE через lint_timer"""
+        editor = self.main.editor
+        if not editor.lint_pending(LINT_SLICE):
+            self.main.lint_timer.start(0)
+        self.show_problems_summary()
+
+    def show_problems_summary(self):
+        """Первая диагностика редактора и их число — без обхода всего списка"""
+        diagnostics = self.main.editor.diagnostics
+        count = len(diagnostics)
+        if not count:
+            self.main.problems.setPlainText("✔ Syntax OK")
+            return
+        line, col, _, msg = next(iter(diagnostics))
+        more = f" и ещё {count - 1}" if count > 1 else ""
+        self.main.problems.setPlainText(f"✖ {msg} (строка {line}, символ {col}){more}")